@@ -0,0 +1,280 @@
+"""
+Microbenchmarks for the scoring, serialization and import hot paths.
+
+Times single calls of the functions behind the busiest endpoints against
+small, medium and large synthetic datasets, each in its own in-memory
+SQLite database:
+
+- results.calculate_user_accuracy: one user's score for an event
+- results.event_leaderboard: the event leaderboard read behind
+  get_event_leaderboard
+- picks.validate: save_user_picks rejecting a card whose last pick is
+  invalid, so every check runs but nothing is written
+- picks.save: save_user_picks for a full card, rolled back after each call
+- import.import_events: importing a full card, rolled back after each call
+- models.JSONEncodedDict: encoding and decoding a legacy picks blob
+- serialize.FightWithFighters: loaded fights to JSON-ready dicts, as the
+  fight card endpoints' response model does
+
+Each benchmark runs --repeat rounds of as many calls as fill about 0.2
+seconds, and reports the per-call minimum and median in ms as JSON. Save
+a run with --output, and compare a later run against it with --baseline:
+benchmarks whose minimum grew by more than --threshold percent are
+flagged, and the script exits with status 1. Compare runs made on the
+same hardware. From the backend directory:
+
+    python benchmarks/hot_paths.py --output baseline.json
+    python benchmarks/hot_paths.py --baseline baseline.json --threshold 10
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entrants with a full card of picks, and fights on that card
+SIZES = {
+    "small": {"users": 50, "fights": 5},
+    "medium": {"users": 500, "fights": 12},
+    "large": {"users": 5000, "fights": 15},
+}
+
+METHODS = ["KO", "SUB", "PTS"]
+
+
+def in_memory_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    import migrations
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    migrations.migrate(engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def synthetic_card(prefix, fights):
+    from routers.import_data import EventImport
+
+    return EventImport(
+        title=f"{prefix} Night",
+        date=date(2030, 1, 1),
+        location="Benchmark Arena",
+        fights=[
+            {
+                "fight_id": f"{prefix}-fight{i}",
+                "weight_class": "Lightweight",
+                "is_main_event": i == 0,
+                "order": i + 1,
+                "fighter1": {"fighter_id": f"{prefix}-f{i}a", "name": f"Fighter {i}A"},
+                "fighter2": {"fighter_id": f"{prefix}-f{i}b", "name": f"Fighter {i}B"},
+            }
+            for i in range(fights)
+        ],
+    )
+
+
+def seed(db, users, fights):
+    """An event with a full card, results for every fight and every user's picks."""
+    from sqlalchemy import insert
+
+    import consensus
+    import models
+    import scoring
+    from routers.import_data import import_events
+
+    event_id = import_events(db, [synthetic_card("bench", fights)])[0]["event_id"]
+    card = db.query(models.Fight).filter(models.Fight.event_id == event_id).order_by(models.Fight.order).all()
+
+    db.execute(insert(models.User), [{"username": f"user{i}", "password_hash": "x"} for i in range(users)])
+    user_ids = [user_id for (user_id,) in db.query(models.User.id).order_by(models.User.id)]
+
+    db.execute(insert(models.Result), [
+        {"fight_id": fight.id, "winner_id": fight.fighter1_id, "method": "KO"} for fight in card
+    ])
+    db.execute(insert(models.UserEventPicks), [{"user_id": user_id, "event_id": event_id} for user_id in user_ids])
+    db.execute(insert(models.Pick), [
+        {
+            "user_id": user_id,
+            "fight_id": fight.id,
+            "fighter_id": fight.fighter1_id if (user_id + i) % 2 else fight.fighter2_id,
+            "method": METHODS[(user_id + i) % len(METHODS)],
+        }
+        for user_id in user_ids
+        for i, fight in enumerate(card)
+    ])
+    consensus.rebuild_pick_counts(db)
+    scoring.refresh_event_scores(db, event_id)
+    db.commit()
+    return event_id, card, user_ids
+
+
+def rolled_back(db, operation):
+    """Run an operation in a savepoint and undo it, so every call sees the same data."""
+    def run():
+        savepoint = db.begin_nested()
+        try:
+            operation()
+        finally:
+            savepoint.rollback()
+    return run
+
+
+def benchmarks(db, size):
+    """Return (name, callable) pairs for one dataset."""
+    from fastapi import HTTPException
+    from pydantic import TypeAdapter
+    from starlette.requests import Request
+    from typing import List
+
+    import models
+    import scoring
+    import sessions
+    from routers.fights import FightWithFighters, with_fighters
+    from routers.import_data import import_events
+    from routers.results import calculate_user_accuracy
+    from routers.user_picks import FightPick, save_user_picks
+
+    event_id, card, user_ids = seed(db, size["users"], size["fights"])
+    user = db.get(models.User, user_ids[0])
+    token = sessions.create_session(db, user)
+    request = Request({"type": "http", "headers": [(b"cookie", f"{sessions.SESSION_COOKIE}={token}".encode())]})
+
+    fighters = {fighter.id: fighter.fighter_id for fighter in db.query(models.Fighter)}
+    picks = [
+        FightPick(fight_id=fight.fight_id, fighter_id=fighters[fight.fighter1_id], method="KO") for fight in card
+    ]
+    invalid_picks = picks[:-1] + [FightPick(fight_id=card[-1].fight_id, fighter_id=fighters[card[0].fighter1_id], method="KO")]
+
+    def validate():
+        try:
+            save_user_picks(db, request, event_id, invalid_picks)
+        except HTTPException:
+            pass
+        else:
+            raise AssertionError("invalid picks were accepted")
+
+    blob_codec = models.JSONEncodedDict()
+    blob = [{"fight_id": pick.fight_id, "fighter_id": pick.fighter_id, "method": pick.method} for pick in picks]
+
+    def json_round_trip():
+        blob_codec.process_result_value(blob_codec.process_bind_param(blob, None), None)
+
+    fights_adapter = TypeAdapter(List[FightWithFighters])
+    loaded_fights = (
+        db.query(models.Fight).options(*with_fighters).filter(models.Fight.event_id == event_id)
+        .order_by(models.Fight.order).all()
+    )
+    import_card = synthetic_card("import", size["fights"])
+
+    return [
+        ("results.calculate_user_accuracy", lambda: calculate_user_accuracy(user.id, event_id, db)),
+        ("results.event_leaderboard", lambda: scoring.read_event_leaderboard(db, event_id)),
+        ("picks.validate", rolled_back(db, validate)),
+        ("picks.save", rolled_back(db, lambda: save_user_picks(db, request, event_id, picks))),
+        ("import.import_events", rolled_back(db, lambda: import_events(db, [import_card]))),
+        ("models.JSONEncodedDict", json_round_trip),
+        ("serialize.FightWithFighters", lambda: fights_adapter.dump_python(
+            fights_adapter.validate_python(loaded_fights, from_attributes=True), mode="json"
+        )),
+    ]
+
+
+def measure(operation, repeat):
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    # autorange stops at 0.2s or more, so keep the loop count it found
+    timings = [elapsed / number * 1000 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "calls_per_round": number,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Per-call minimum against the baseline's, flagging growth over the threshold percent."""
+    comparison = {}
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            before = baseline.get("results", {}).get(name, {}).get(size)
+            if not before:
+                continue
+            change = (result["min_ms"] - before["min_ms"]) / before["min_ms"] * 100
+            comparison.setdefault(name, {})[size] = {
+                "baseline_min_ms": before["min_ms"],
+                "min_ms": result["min_ms"],
+                "change_percent": change,
+                "regression": change > threshold,
+            }
+    return comparison
+
+
+def run(args):
+    results = {}
+    for size_name in args.sizes:
+        db = in_memory_session()
+        try:
+            for name, operation in benchmarks(db, SIZES[size_name]):
+                if args.only and not any(pattern in name for pattern in args.only):
+                    continue
+                results.setdefault(name, {})[size_name] = measure(operation, args.repeat)
+        finally:
+            db.close()
+
+    report = {
+        "settings": {"sizes": {name: SIZES[name] for name in args.sizes}, "repeat": args.repeat},
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(results, json.load(f), args.threshold)
+        report["threshold_percent"] = args.threshold
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="datasets to run on")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--output", help="save the results as JSON to this file, e.g. as a baseline")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    # The app's own engines are created at import time; keep their files out of the way
+    output = os.path.abspath(args.output) if args.output else None
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+    os.chdir(tempfile.mkdtemp(prefix="punchpicks-bench-"))
+    sys.path.insert(0, BACKEND_DIR)
+
+    report = run(args)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    regressions = [
+        name for name, sizes in report.get("comparison", {}).items()
+        if any(size["regression"] for size in sizes.values())
+    ]
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark a login burst against the latency of the other endpoints.
+
+Measures fight card latency on its own, then again while a burst of
+concurrent logins runs, and reports login throughput, how many logins
+were turned away with 503, and the fight card latency in both phases.
+
+Runs the app in-process against a throwaway SQLite database. Needs httpx
+on top of the backend requirements. From the backend directory:
+
+    python benchmarks/login_burst.py --users 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples) if samples else None,
+    }
+
+
+async def sample_reads(client, url, stop, samples):
+    """Issue reads back to back until stopped, recording latency in ms."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+async def run(args):
+    import httpx
+    import hashing
+    import main
+    import migrations
+
+    migrations.migrate(main.engine)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Seed an event and the users who will log in
+        response = await client.post("/api/import/sample-data")
+        event_id = response.json()["event_id"]
+        card_url = f"/api/fights/event/{event_id}"
+        for i in range(args.users):
+            await client.post("/api/auth/register", json={"username": f"user{i}", "password": "password"})
+
+        # Phase 1: fight card latency with no logins running
+        stop = asyncio.Event()
+        baseline = []
+        readers = [asyncio.create_task(sample_reads(client, card_url, stop, baseline)) for _ in range(args.readers)]
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await asyncio.gather(*readers)
+
+        # Phase 2: the same reads while every user logs in at once
+        stop = asyncio.Event()
+        under_burst = []
+        readers = [asyncio.create_task(sample_reads(client, card_url, stop, under_burst)) for _ in range(args.readers)]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = {}
+
+        async def login(i):
+            async with semaphore:
+                response = await client.post("/api/auth/login", json={"username": f"user{i}", "password": "password"})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.users)))
+        burst_seconds = time.perf_counter() - started
+
+        stop.set()
+        await asyncio.gather(*readers)
+
+    return {
+        "settings": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "readers": args.readers,
+            "bcrypt_rounds": int(os.environ["PUNCHPICKS_BCRYPT_ROUNDS"]),
+            "hash_workers": hashing.HASH_WORKERS,
+            "hash_queue_size": hashing.HASH_QUEUE_SIZE,
+        },
+        "login": {
+            "seconds": burst_seconds,
+            "successful_per_second": statuses.get(200, 0) / burst_seconds,
+            "status_counts": statuses,
+        },
+        "fight_card_baseline": summarize(baseline),
+        "fight_card_during_login_burst": summarize(under_burst),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="number of users logging in")
+    parser.add_argument("--concurrency", type=int, default=50, help="logins in flight at once")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent fight card readers")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0, help="duration of the baseline phase")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor")
+    parser.add_argument("--hash-workers", type=int, help="password hashing threads")
+    parser.add_argument("--hash-queue-size", type=int, help="logins allowed to wait for a hashing thread")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so set them before importing the app
+    os.environ["PUNCHPICKS_BCRYPT_ROUNDS"] = str(args.rounds)
+    if args.hash_workers is not None:
+        os.environ["PUNCHPICKS_HASH_WORKERS"] = str(args.hash_workers)
+    if args.hash_queue_size is not None:
+        os.environ["PUNCHPICKS_HASH_QUEUE_SIZE"] = str(args.hash_queue_size)
+    os.chdir(tempfile.mkdtemp(prefix="punchpicks-bench-"))
+    sys.path.insert(0, BACKEND_DIR)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Load test the minutes before picks lock, end to end through the API.
+
+Seeds a synthetic dataset through the import and registration endpoints
+(N users, M events with full cards), then every user logs in, loads a
+fight card, and performs a series of actions drawn from the user mix:
+reloading the card, reading their picks, submitting picks and reading
+the leaderboard. Reports latency percentiles, throughput and error rates
+per endpoint as JSON. Leaderboard reads before anyone on the event has
+submitted picks get a 404, and count as errors.
+
+By default the app runs in-process against a throwaway SQLite database;
+pass --url to drive a server over HTTP instead (it must allow
+registration and use a database you can throw away). Every random choice
+comes from --seed, so runs with the same arguments issue the same
+requests and are comparable on the same hardware. Needs httpx on top of
+the backend requirements. From the backend directory:
+
+    python benchmarks/pick_lock_surge.py --users 500 --events 3 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+METHODS = ["KO", "SUB", "PTS"]
+ACTIONS = ["card", "picks", "submit", "leaderboard"]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, statuses, seconds):
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(samples),
+        "per_second": len(samples) / seconds if seconds else None,
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else None,
+        "status_counts": dict(sorted(statuses.items())),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples) if samples else None,
+    }
+
+
+def parse_mix(value):
+    """Parse "card=2,picks=1,submit=1,leaderboard=3" into action weights."""
+    weights = dict.fromkeys(ACTIONS, 0.0)
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        if action.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"unknown action {action!r}; expected {', '.join(ACTIONS)}")
+        weights[action.strip()] = float(weight)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one action with a positive weight")
+    return weights
+
+
+def synthetic_event(index, fights):
+    """A full card for the import endpoint, with fighters unique to the event."""
+    return {
+        "title": f"Surge Night {index + 1}",
+        "date": date(2030, 1, 1 + index % 28).isoformat(),
+        "location": "Load Test Arena",
+        "fights": [
+            {
+                "fight_id": f"surge{index}-fight{i}",
+                "weight_class": "Lightweight",
+                "is_main_event": i == 0,
+                "order": i + 1,
+                "fighter1": {"fighter_id": f"surge{index}-f{i}a", "name": f"Fighter {index}-{i}A"},
+                "fighter2": {"fighter_id": f"surge{index}-f{i}b", "name": f"Fighter {index}-{i}B"},
+            }
+            for i in range(fights)
+        ],
+    }
+
+
+class Recorder:
+    """Latency samples and status counts per endpoint, keyed by route template."""
+
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+
+    async def request(self, client, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception:
+            response, status = None, 599
+        self.samples.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+        return response
+
+    def report(self, seconds):
+        endpoints = {
+            endpoint: summarize(samples, self.statuses[endpoint], seconds)
+            for endpoint, samples in sorted(self.samples.items())
+        }
+        statuses = {}
+        for counts in self.statuses.values():
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+        overall = summarize([sample for samples in self.samples.values() for sample in samples], statuses, seconds)
+        return overall, endpoints
+
+
+async def seed(client, args):
+    """Create the events through the import path and register every user."""
+    events = []
+    for i in range(args.events):
+        response = await client.post("/api/import/event", json=synthetic_event(i, args.fights))
+        response.raise_for_status()
+        event_id = response.json()["event_id"]
+        card = (await client.get(f"/api/fights/event/{event_id}")).json()
+        events.append({
+            "id": event_id,
+            "fights": [(fight["fight_id"], fight["fighter1"]["fighter_id"], fight["fighter2"]["fighter_id"]) for fight in card],
+        })
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def register(i):
+        async with semaphore:
+            response = await client.post("/api/auth/register", json={"username": f"surge{i}", "password": "password"})
+            response.raise_for_status()
+
+    await asyncio.gather(*(register(i) for i in range(args.users)))
+    return events
+
+
+def plan(args, events):
+    """Decide every user's event and actions up front from the seed."""
+    rng = random.Random(args.seed)
+    actions, weights = zip(*args.mix.items())
+    plans = []
+    for i in range(args.users):
+        event = rng.choice(events)
+        steps = []
+        for action in rng.choices(actions, weights, k=args.actions):
+            picks = None
+            if action == "submit":
+                picks = [
+                    {"fight_id": fight_id, "fighter_id": rng.choice([fighter1, fighter2]), "method": rng.choice(METHODS)}
+                    for fight_id, fighter1, fighter2 in event["fights"]
+                ]
+            steps.append((action, picks))
+        plans.append((i, event["id"], steps))
+    return plans
+
+
+async def surge_user(make_client, recorder, user, event_id, steps):
+    """One user's visit: log in, load the card, then the planned actions."""
+    async with make_client() as client:
+        response = await recorder.request(client, "POST /api/auth/login", "POST", "/api/auth/login",
+                                          json={"username": f"surge{user}", "password": "password"})
+        if response is None or response.status_code != 200:
+            return
+        await recorder.request(client, "GET /api/fights/event/{id}", "GET", f"/api/fights/event/{event_id}")
+
+        for action, picks in steps:
+            if action == "card":
+                await recorder.request(client, "GET /api/fights/event/{id}", "GET", f"/api/fights/event/{event_id}")
+            elif action == "picks":
+                await recorder.request(client, "GET /api/picks/event/{id}", "GET", f"/api/picks/event/{event_id}")
+            elif action == "submit":
+                await recorder.request(client, "POST /api/picks/event/{id}", "POST", f"/api/picks/event/{event_id}", json=picks)
+            else:
+                await recorder.request(client, "GET /api/results/leaderboard/{id}", "GET", f"/api/results/leaderboard/{event_id}")
+
+
+async def run(args):
+    import httpx
+
+    app = None
+    if args.url:
+        def make_client():
+            return httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        import main
+        import migrations
+
+        migrations.migrate(main.engine)
+        app = main.app
+        transport = httpx.ASGITransport(app=app)
+
+        def make_client():
+            return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout)
+
+    async with make_client() as client:
+        seed_started = time.perf_counter()
+        events = await seed(client, args)
+        seed_seconds = time.perf_counter() - seed_started
+
+    plans = plan(args, events)
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def visit(user, event_id, steps):
+        async with semaphore:
+            await surge_user(make_client, recorder, user, event_id, steps)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(visit(*user_plan) for user_plan in plans))
+    seconds = time.perf_counter() - started
+
+    if app is not None:
+        # Commit anything the group commit writer still holds
+        main.writer.close()
+
+    overall, endpoints = recorder.report(seconds)
+    return {
+        "settings": {
+            "target": args.url or "in-process",
+            "users": args.users,
+            "events": args.events,
+            "fights_per_event": args.fights,
+            "concurrency": args.concurrency,
+            "actions_per_user": args.actions,
+            "mix": args.mix,
+            "seed": args.seed,
+            "bcrypt_rounds": args.rounds,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "seed_seconds": seed_seconds,
+        "surge_seconds": seconds,
+        "overall": overall,
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="users taking part in the surge")
+    parser.add_argument("--events", type=int, default=1, help="events on sale, each user picks one")
+    parser.add_argument("--fights", type=int, default=12, help="fights on each card")
+    parser.add_argument("--concurrency", type=int, default=50, help="users active at once")
+    parser.add_argument("--actions", type=int, default=6, help="actions per user after loading the card")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("card=2,picks=1,submit=1,leaderboard=2"),
+                        help="relative weights of the actions (default: card=2,picks=1,submit=1,leaderboard=2)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the users' plans")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor (in-process only)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    parser.add_argument("--url", help="base URL of a running server, e.g. http://localhost:8000")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Settings are read at import time, so set them before importing the app
+        os.environ["PUNCHPICKS_BCRYPT_ROUNDS"] = str(args.rounds)
+        os.chdir(tempfile.mkdtemp(prefix="punchpicks-bench-"))
+        sys.path.insert(0, BACKEND_DIR)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark read and write concurrency with the SQLite profile on and off.
+
+Seeds a card of fights and a set of users with picks into a fresh database
+file for each run, then for a fixed duration runs writer threads that
+resubmit users' picks while reader threads score the event's leaderboard.
+Reports throughput, latency percentiles and "database is locked" errors
+for both the reads and the writes as JSON. From the backend directory:
+
+    python benchmarks/sqlite_profile.py --writers 8 --readers 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, errors, seconds):
+    return {
+        "operations": len(samples),
+        "per_second": len(samples) / seconds,
+        "errors": errors,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples) if samples else None,
+    }
+
+
+def seed(Session, users, fights):
+    import models
+
+    db = Session()
+    event = models.Event(title="Benchmark Night", location="Benchmark Arena")
+    db.add(event)
+    db.flush()
+
+    card = []
+    for i in range(fights):
+        fighter1 = models.Fighter(fighter_id=f"f{i}a", name=f"Fighter {i}A")
+        fighter2 = models.Fighter(fighter_id=f"f{i}b", name=f"Fighter {i}B")
+        db.add_all([fighter1, fighter2])
+        db.flush()
+        fight = models.Fight(fight_id=f"fight{i}", event_id=event.id, fighter1_id=fighter1.id,
+                             fighter2_id=fighter2.id, weight_class="Lightweight", order=i + 1)
+        db.add(fight)
+        db.flush()
+        card.append((fight.id, fighter1.id, fighter2.id))
+        if i % 2:
+            db.add(models.Result(fight_id=fight.id, winner_id=fighter1.id, method="KO"))
+
+    user_ids = []
+    for i in range(users):
+        user = models.User(username=f"user{i}", password_hash="x")
+        db.add(user)
+        db.flush()
+        user_ids.append(user.id)
+        db.add(models.UserEventPicks(user_id=user.id, event_id=event.id))
+        db.bulk_insert_mappings(models.Pick, [
+            {"user_id": user.id, "fight_id": fight_id, "fighter_id": random.choice((f1, f2)), "method": "KO"}
+            for fight_id, f1, f2 in card
+        ])
+
+    event_id = event.id
+    db.commit()
+    db.close()
+    return event_id, card, user_ids
+
+
+def run_profile(profile_enabled, args):
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    import database
+    import migrations
+    import models
+    import scoring
+
+    path = os.path.join(tempfile.mkdtemp(prefix="punchpicks-bench-"), "bench.db")
+    engine = database.create_sqlite_engine(f"sqlite:///{path}", profile_enabled)
+    migrations.migrate(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    event_id, card, user_ids = seed(Session, args.users, args.fights)
+    stop = threading.Event()
+    results = {"reads": ([], [0]), "writes": ([], [0])}
+
+    def timed(kind, operation):
+        samples, errors = results[kind]
+        while not stop.is_set():
+            db = Session()
+            started = time.perf_counter()
+            try:
+                operation(db)
+                samples.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                db.rollback()
+                errors[0] += 1
+            finally:
+                db.close()
+
+    def write(db):
+        # The same statements submit_user_picks runs: replace one user's picks
+        user_id = random.choice(user_ids)
+        db.query(models.Pick).filter(models.Pick.user_id == user_id).delete(synchronize_session=False)
+        db.bulk_insert_mappings(models.Pick, [
+            {"user_id": user_id, "fight_id": fight_id, "fighter_id": random.choice((f1, f2)), "method": "SUB"}
+            for fight_id, f1, f2 in card
+        ])
+        scoring.refresh_user_event_score(db, user_id, event_id)
+        db.commit()
+
+    def read(db):
+        scoring.score_event(db, event_id)
+        scoring.read_event_leaderboard(db, event_id)
+
+    threads = [threading.Thread(target=timed, args=("writes", write)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=timed, args=("reads", read)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        kind: summarize(samples, errors[0], args.seconds) for kind, (samples, errors) in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000, help="users with picks on the card")
+    parser.add_argument("--fights", type=int, default=14, help="fights on the card")
+    parser.add_argument("--writers", type=int, default=8, help="concurrent pick submitters")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent leaderboard readers")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration of each run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="punchpicks-bench-"))
+    sys.path.insert(0, BACKEND_DIR)
+
+    report = {"settings": vars(args)}
+    for name, enabled in (("profile_off", False), ("profile_on", True)):
+        random.seed(args.seed)
+        report[name] = run_profile(enabled, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
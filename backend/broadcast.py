@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Set
+
+# Frames a slow client may fall behind by before it is disconnected; its
+# EventSource reconnects and reloads the board
+LIVE_QUEUE_SIZE = int(os.environ.get("PUNCHPICKS_LIVE_QUEUE_SIZE", 32))
+
+# Seconds between keep-alive comments on an idle stream
+LIVE_HEARTBEAT_SECONDS = float(os.environ.get("PUNCHPICKS_LIVE_HEARTBEAT_SECONDS", 15))
+
+HEARTBEAT = b": ping\n\n"
+_CLOSED = None
+
+# Leaderboard entry fields sent for entrants whose score changed in place
+SCORE_FIELDS = ("user_id", "total_picks", "correct_picks", "accuracy_percentage")
+
+
+def sse_frame(kind: str, data: dict) -> bytes:
+    """Encode one Server-Sent Event."""
+    return f"event: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+def rank_changes(before: List[dict], after: List[dict]) -> dict:
+    """
+    Diff two leaderboards from scoring.read_event_leaderboard: the entries
+    that are new or whose rank moved, just the score fields of entries that
+    kept their rank but whose score changed, and the users who dropped off.
+    """
+    previous = {entry["user_id"]: entry for entry in before}
+    changed = []
+    scores = []
+    for entry in after:
+        old = previous.pop(entry["user_id"], None)
+        if old is None or old["rank"] != entry["rank"]:
+            changed.append(dict(entry, previous_rank=old["rank"] if old else None))
+        elif old != entry:
+            scores.append({field: entry[field] for field in SCORE_FIELDS})
+    return {"changed": changed, "scores": scores, "removed": sorted(previous)}
+
+
+class EventFeed:
+    """
+    In-process fan-out of live updates per event. Each change is encoded
+    once and the same bytes are queued to every subscriber, so a change
+    costs one computation however many clients are connected. Publish and
+    subscribe only from the event loop; has_subscribers may be called from
+    the writer thread.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def has_subscribers(self, event_id: int) -> bool:
+        return bool(self._subscribers.get(event_id))
+
+    def subscribe(self, event_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(event_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, event_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(event_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[event_id]
+
+    def publish(self, event_id: int, kind: str, data: dict):
+        """Queue an event to every subscriber of the given event."""
+        queues = self._subscribers.get(event_id)
+        if not queues:
+            return
+
+        frame = sse_frame(kind, data)
+        for queue in list(queues):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Close the stream rather than buffer without bound
+                self._close(event_id, queue)
+
+    async def stream(self, event_id: int, heartbeat_seconds: float = LIVE_HEARTBEAT_SECONDS):
+        """Yield an event's frames to one client until it disconnects or falls behind."""
+        queue = self.subscribe(event_id)
+        try:
+            yield sse_frame("subscribed", {"event_id": event_id})
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    frame = HEARTBEAT
+                if frame is _CLOSED:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(event_id, queue)
+
+    def close(self):
+        """End every open stream, e.g. at shutdown."""
+        for event_id, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._close(event_id, queue)
+
+    def _close(self, event_id: int, queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSED)
+        self.unsubscribe(event_id, queue)
+
+
+feed = EventFeed(LIVE_QUEUE_SIZE)
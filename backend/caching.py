@@ -0,0 +1,147 @@
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import case, event, select
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+# Data scopes that read endpoints depend on and write endpoints bump
+EVENTS = "events"
+FIGHTERS = "fighters"
+FIGHTS = "fights"
+RESULTS = "results"
+PICKS = "picks"
+SCORES = "scores"
+
+# Last-Modified for a scope that was never bumped, so has not changed since
+# the database was migrated; each process uses its own start time
+_started = int(time.time())
+
+# Seconds a process reuses the versions it last read before querying them
+# again; writes committed by another process go unseen for up to this long
+VERSION_CACHE_SECONDS = float(os.environ.get("PUNCHPICKS_VERSION_CACHE_SECONDS", 1))
+
+_versions: Dict[str, Tuple[int, int]] = {}
+_versions_read_at = float("-inf")
+# Incremented whenever this process commits a bump, so a read that started
+# before the commit does not cache what it saw
+_generation = 0
+_BUMPED = "caching.bumped"
+
+
+def bump(db: Session, *scopes: str):
+    """
+    Mark data in the given scopes as changed, in the caller's transaction
+    before it commits: the new versions commit with the write or not at
+    all, and every API process reads them from the database.
+    """
+    db.info[_BUMPED] = True
+    now = int(time.time())
+    table = models.DataVersion.__table__
+    statement = database.UPSERT_INSERTS[db.get_bind().dialect.name](table).values([
+        {"scope": scope, "version": 1, "modified": now} for scope in sorted(set(scopes))
+    ])
+    db.execute(statement.on_conflict_do_update(index_elements=["scope"], set_={
+        "version": table.c.version + 1,
+        # Keep Last-Modified strictly increasing at one-second resolution
+        "modified": case((table.c.modified < now, now), else_=table.c.modified + 1),
+    }))
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_versions(session: Session):
+    # This process's own writes show up on its next read, not a second later
+    global _generation, _versions_read_at
+    if session.info.pop(_BUMPED, False):
+        _generation += 1
+        _versions_read_at = float("-inf")
+
+
+async def read_versions(scopes: List[str]) -> List[Tuple[int, int]]:
+    """
+    The (version, Last-Modified timestamp) of each scope. Every scope is
+    read from the primary with one query and reused for
+    VERSION_CACHE_SECONDS, so polling clients cost at most one query per
+    process per period. The trade-off: for that long after another process
+    commits a write, this one can still answer 304 for the old data. Writes
+    committed by this process are seen at once.
+    """
+    global _versions, _versions_read_at
+    if time.monotonic() - _versions_read_at >= VERSION_CACHE_SECONDS:
+        generation = _generation
+        async with database.async_engine.connect() as connection:
+            rows = await connection.execute(
+                select(models.DataVersion.scope, models.DataVersion.version, models.DataVersion.modified)
+            )
+            versions = {scope: (version, modified) for scope, version, modified in rows}
+        if generation != _generation:
+            # A bump committed while we read; use what we saw, but don't keep it
+            return [versions.get(scope, (0, _started)) for scope in scopes]
+        _versions, _versions_read_at = versions, time.monotonic()
+    return [_versions.get(scope, (0, _started)) for scope in scopes]
+
+
+def validators(states: List[Tuple[int, int]], user_key: str = "") -> Tuple[str, int]:
+    """Return the (ETag, Last-Modified timestamp) for the scopes' (version, modified) states."""
+    tag = "-".join(str(version) for version, _ in states)
+    if user_key:
+        tag += "-" + hashlib.sha256(user_key.encode()).hexdigest()[:12]
+    return f'W/"{tag}"', max(modified for _, modified in states)
+
+
+def _not_modified(request: Request, etag: str, last_modified: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional(*scopes: str, per_user: bool = False):
+    """
+    Dependency for GET routes whose response only changes when the given
+    scopes are bumped. Reads the scopes' versions, then answers If-None-Match / If-Modified-Since with a 304 before the route
+    queries or serializes anything, and otherwise sets ETag and
+    Last-Modified on the response. Use per_user for responses that depend
+    on the caller's session. The versions come from read_versions, cached
+    per process for VERSION_CACHE_SECONDS; when they are read, the query
+    goes through the async engine on the event loop rather than taking a
+    worker thread.
+
+    While a read replica may still be catching up with a change, responses
+    carry no validators, so a stale read is never revalidated as current.
+    """
+    scopes = sorted(scopes)
+
+    async def check(request: Request, response: Response):
+        user_key = request.cookies.get("session", "") if per_user else ""
+        etag, last_modified = validators(await read_versions(scopes), user_key)
+        if database.REPLICA_DATABASE_URL and time.time() - last_modified < database.REPLICA_LAG_SECONDS:
+            response.headers["Cache-Control"] = "no-cache"
+            return
+
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if per_user:
+            headers["Vary"] = "Cookie"
+
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
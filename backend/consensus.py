@@ -0,0 +1,111 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from database import upsert
+
+# A pick as counted: (fight pk, fighter pk, method)
+PickKey = Tuple[int, int, Optional[str]]
+
+
+def apply_pick_changes(db: Session, old_picks: Iterable[PickKey], new_picks: Iterable[PickKey]):
+    """
+    Move the pick counters from a user's old picks to their new ones with
+    one upsert. Does not commit, so the counts land in the caller's
+    transaction with the picks themselves.
+    """
+    delta = Counter(new_picks)
+    delta.subtract(Counter(old_picks))
+    rows = [
+        {"fight_id": fight_id, "fighter_id": fighter_id, "method": method, "picks": change}
+        for (fight_id, fighter_id, method), change in delta.items()
+        if change
+    ]
+    if rows:
+        db.execute(upsert(db, models.PickCount, rows, ["fight_id", "fighter_id", "method"], increment_columns=["picks"]))
+
+
+def _counted_picks(fight_ids=None):
+    """Aggregate over the pick rows, which the counters must always match."""
+    query = (
+        select(models.Pick.fight_id, models.Pick.fighter_id, models.Pick.method, func.count(models.Pick.id))
+        .group_by(models.Pick.fight_id, models.Pick.fighter_id, models.Pick.method)
+    )
+    if fight_ids is not None:
+        query = query.where(models.Pick.fight_id.in_(fight_ids))
+    return query
+
+
+def find_drift(db: Session) -> List[int]:
+    """Return the ids of fights whose counters do not match their pick rows."""
+    expected = {(fight_id, fighter_id, method): count for fight_id, fighter_id, method, count in db.execute(_counted_picks())}
+    actual = Counter()
+    for fight_id, fighter_id, method, count in db.query(
+        models.PickCount.fight_id, models.PickCount.fighter_id, models.PickCount.method, models.PickCount.picks
+    ):
+        actual[(fight_id, fighter_id, method)] += count
+
+    keys = set(expected) | {key for key, count in actual.items() if count}
+    return sorted({key[0] for key in keys if expected.get(key, 0) != actual.get(key, 0)})
+
+
+def rebuild_pick_counts(db: Session, fight_ids: Optional[List[int]] = None) -> int:
+    """
+    Recompute the counters from the pick rows, for the given fights or all
+    of them. Does not commit. Returns the number of counter rows written.
+    """
+    delete = models.PickCount.__table__.delete()
+    if fight_ids is not None:
+        delete = delete.where(models.PickCount.fight_id.in_(fight_ids))
+    db.execute(delete)
+
+    result = db.execute(insert(models.PickCount).from_select(
+        ["fight_id", "fighter_id", "method", "picks"], _counted_picks(fight_ids)
+    ))
+    return result.rowcount
+
+
+def _share(count: int, total: int) -> float:
+    return count / total * 100 if total else 0
+
+
+def read_card_consensus(db: Session, event_id: int) -> List[dict]:
+    """
+    Read the pick distribution for every fight on an event's card, in card
+    order, with one query over the counters.
+    """
+    rows = (
+        db.query(models.Fight.fight_id, models.Fighter.fighter_id, models.PickCount.method, models.PickCount.picks)
+        .outerjoin(models.PickCount, and_(models.PickCount.fight_id == models.Fight.id, models.PickCount.picks > 0))
+        .outerjoin(models.Fighter, models.Fighter.id == models.PickCount.fighter_id)
+        .filter(models.Fight.event_id == event_id)
+        .order_by(models.Fight.order, models.Fight.id)
+        .all()
+    )
+
+    fights: Dict[str, Tuple[Counter, Counter]] = {}
+    for fight_id, fighter_id, method, count in rows:
+        by_fighter, by_method = fights.setdefault(fight_id, (Counter(), Counter()))
+        if count:
+            by_fighter[fighter_id] += count
+            by_method[method] += count
+
+    consensus = []
+    for fight_id, (by_fighter, by_method) in fights.items():
+        total = sum(by_fighter.values())
+        consensus.append({
+            "fight_id": fight_id,
+            "total_picks": total,
+            "fighters": [
+                {"fighter_id": fighter_id, "picks": count, "percentage": _share(count, total)}
+                for fighter_id, count in by_fighter.most_common()
+            ],
+            "methods": [
+                {"method": method, "picks": count, "percentage": _share(count, total)}
+                for method, count in by_method.most_common()
+            ],
+        })
+    return consensus
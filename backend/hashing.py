@@ -0,0 +1,56 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# bcrypt work factor; raising it upgrades stored hashes as users log in
+BCRYPT_ROUNDS = int(os.environ.get("PUNCHPICKS_BCRYPT_ROUNDS", 12))
+
+# Threads dedicated to hashing, and how many more requests may wait for one
+HASH_WORKERS = int(os.environ.get("PUNCHPICKS_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.environ.get("PUNCHPICKS_HASH_QUEUE_SIZE", 32))
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a thread pool hashes in parallel without
+# holding the threads that serve every other endpoint
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_SIZE)
+
+
+async def _run(func, *args):
+    """
+    Run a hashing call on the dedicated executor. If every worker is busy and
+    the queue is full, fail fast with a 503 instead of piling up requests.
+    """
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+
+    # Free the slot when the hash finishes, even if the request was cancelled
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_and_update(password: str, password_hash: str):
+    """
+    Verify a password. Returns (valid, new_hash) where new_hash is a rehash
+    to store if the existing hash uses outdated settings, otherwise None.
+    """
+    return await _run(pwd_context.verify_and_update, password, password_hash)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+import caching
+import models
+import scoring
+from database import SessionLocal
+from writer import writer
+
+logger = logging.getLogger(__name__)
+
+# Longest the scheduler sleeps before looking for new or rescheduled events
+LOCK_POLL_SECONDS = float(os.environ.get("PUNCHPICKS_LOCK_POLL_SECONDS", 30))
+
+
+def has_started(event: models.Event) -> bool:
+    # Server databases return timezone-aware start dates, SQLite naive ones
+    return bool(event.start_date) and event.start_date <= datetime.now(event.start_date.tzinfo)
+
+
+def lock_event(db: Session, event_id: int) -> Optional[models.EventLock]:
+    """
+    Lock an event's picks: record the lock, copy every pick on the card into
+    locked_picks, and rescore the entrants from that snapshot. Returns the
+    lock, or None if the event was already locked. Does not commit; run it
+    on the group commit writer so it is ordered with pick submissions.
+    """
+    if scoring.is_locked(db, event_id):
+        return None
+
+    db.execute(insert(models.LockedPick).from_select(
+        ["event_id", "user_id", "fight_id", "fighter_id", "method"],
+        select(literal(event_id), models.Pick.user_id, models.Pick.fight_id, models.Pick.fighter_id, models.Pick.method)
+        .join(models.Fight, models.Fight.id == models.Pick.fight_id)
+        .where(models.Fight.event_id == event_id)
+        .order_by(models.Pick.id)
+    ))
+    entrants, total_picks = db.query(
+        func.count(func.distinct(models.LockedPick.user_id)), func.count(models.LockedPick.id)
+    ).filter(models.LockedPick.event_id == event_id).one()
+
+    lock = models.EventLock(event_id=event_id, entrants=entrants, total_picks=total_picks)
+    db.add(lock)
+
+    # Scores from here on are computed from the snapshot
+    scoring.refresh_event_scores(db, event_id)
+    caching.bump(db, caching.PICKS, caching.SCORES)
+    return lock
+
+
+def due_events(db: Session) -> Tuple[List[int], Optional[datetime]]:
+    """
+    Return the ids of unlocked events that have started, and the start
+    date of the next unlocked event still to come.
+    """
+    events = (
+        db.query(models.Event)
+        .outerjoin(models.EventLock, models.EventLock.event_id == models.Event.id)
+        .filter(models.Event.start_date.isnot(None), models.EventLock.id.is_(None))
+        .all()
+    )
+    due = [event.id for event in events if has_started(event)]
+    upcoming = [event.start_date for event in events if not has_started(event)]
+    return due, min(upcoming, key=lambda start: start.timestamp()) if upcoming else None
+
+
+class PickLockScheduler:
+    """
+    Background task that locks each event when its start date passes. It
+    sleeps until the next start date, but never longer than
+    LOCK_POLL_SECONDS, so newly created or rescheduled events are picked
+    up. Submissions are also refused once the start date has passed, so
+    picks stay locked on time even if the scheduler runs late.
+    """
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def run_once(self) -> float:
+        """Lock every event that has started; return the seconds until the next check."""
+        due, next_start = await run_in_threadpool(self._load_due_events)
+        for event_id in due:
+            lock = await writer.run(lock_event, event_id)
+            if lock is not None:
+                logger.info("Locked picks for event %s: %s entrants, %s picks", event_id, lock.entrants, lock.total_picks)
+
+        if next_start is None:
+            return self.poll_seconds
+        wait = next_start.timestamp() - datetime.now(next_start.tzinfo).timestamp()
+        return min(self.poll_seconds, max(wait, 0))
+
+    def _load_due_events(self):
+        db = SessionLocal()
+        try:
+            return due_events(db)
+        finally:
+            db.close()
+
+    async def _run_forever(self):
+        while True:
+            try:
+                wait = await self.run_once()
+            except Exception:
+                logger.exception("Pick lock check failed")
+                wait = self.poll_seconds
+            await asyncio.sleep(wait)
+
+
+scheduler = PickLockScheduler(LOCK_POLL_SECONDS)
@@ -1,13 +1,18 @@
 from fastapi import Depends, FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-import models
-from database import engine, get_db
-from routers import fighters, events, fights, import_data, user_picks, auth, results
-
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+import metrics
+import migrations
+from broadcast import feed
+from database import async_engine, async_pool_metrics, engine, get_db, pool_metrics, slow_query_log
+from pagination import NEXT_CURSOR_HEADER
+from routers import fighters, events, fights, import_data, user_picks, auth, results, live
+from locking import scheduler
+from writer import writer
 
 # Initialize FastAPI app
 app = FastAPI(title="Punch Picks API", description="API for the Punch Picks MMA prediction application")
@@ -24,8 +29,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Record latency, status, size and SQL statements per route
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(fighters.router, prefix="/api")
 app.include_router(events.router, prefix="/api")
@@ -34,6 +43,23 @@ app.include_router(import_data.router, prefix="/api")
 app.include_router(user_picks.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(results.router, prefix="/api")
+app.include_router(live.router, prefix="/api")
+
+
+# Check the schema is migrated, then lock each event's picks when it starts
+@app.on_event("startup")
+async def startup():
+    await run_in_threadpool(migrations.verify, engine)
+    scheduler.start()
+
+# End live streams, commit queued writes, then close the async engine's
+# connections before the event loop goes away
+@app.on_event("shutdown")
+async def shutdown():
+    feed.close()
+    await scheduler.stop()
+    await run_in_threadpool(writer.close)
+    await async_engine.dispose()
 
 
 # Root endpoint
@@ -48,18 +74,53 @@ def read_root():
             "events": "/api/events",
             "fights": "/api/fights",
             "import": "/api/import",
-            "picks": "/api/picks"
+            "picks": "/api/picks",
+            "live": "/api/live/events/{event_id}"
         }
     }
 
 # Health check endpoint
 @app.get("/health")
-def health_check():
+def health_check(db: Session = Depends(get_db)):
     try:
-        # Get a database session
-        db = next(get_db())
         # Try a simple query
-        db.execute("SELECT 1").fetchall()
+        db.execute(text("SELECT 1")).fetchall()
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
\ No newline at end of file
+        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+
+# Connection pool metrics
+@app.get("/health/pool")
+def pool_health():
+    """
+    Connection checkouts since startup, how long they waited for a free
+    connection, how often the pool was exhausted, and its current usage,
+    for the sync pool and under "async" for the async routes' pool.
+    """
+    return {
+        "backend": engine.dialect.name,
+        **pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+    }
+
+# Slow query log
+@app.get("/health/slow-queries")
+def slow_queries(limit: int = 20):
+    """
+    Statements slower than PUNCHPICKS_SLOW_QUERY_MS, grouped by shape and
+    most costly in total first, with the routes that ran them, the tables
+    their query plan scans in full, and the plan itself.
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_seconds * 1000 if slow_query_log.threshold_seconds is not None else None,
+        "statements": slow_query_log.snapshot(limit),
+    }
+
+# Prometheus metrics
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Request counts, latency, response size, SQL statements and database
+    time per request, by route template, in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
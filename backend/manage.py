@@ -0,0 +1,129 @@
+import argparse
+import sys
+
+import caching
+import consensus
+import migrations
+from database import SessionLocal, engine
+import models
+import scoring
+
+
+def rebuild_scores():
+    """Recompute user_event_scores from UserEventPicks and Result."""
+    db = SessionLocal()
+    try:
+        count = scoring.rebuild_scores(db)
+        caching.bump(db, caching.SCORES)
+        db.commit()
+        print(f"Rebuilt {count} user event scores")
+    finally:
+        db.close()
+
+
+def migrate():
+    """Apply pending schema migrations, creating the schema for a new database."""
+    applied = migrations.migrate(engine)
+    for migration in applied:
+        print(f"Applied migration {migration.version}: {migration.name}")
+    print(f"Database schema is at version {migrations.SCHEMA_VERSION}")
+
+
+def check_query_plans():
+    """Check that the hot queries' plans use their indexes (SQLite only)."""
+    if engine.dialect.name != "sqlite":
+        print(f"Query plan checks only run on SQLite, not {engine.dialect.name}")
+        return
+
+    migrations.verify(engine)
+    with engine.connect() as connection:
+        problems = migrations.check_query_plans(connection)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print(f"All {len(migrations.HOT_QUERIES)} hot queries use their indexes")
+
+
+def migrate_picks():
+    """
+    Move picks out of the legacy UserEventPicks.picks JSON blobs into Pick rows.
+    Safe to run repeatedly: migrated blobs are cleared, and users who already
+    have Pick rows for an event keep them.
+    """
+    migrations.verify(engine)
+
+    db = SessionLocal()
+    try:
+        fights = {
+            fight_id: (id, event_id)
+            for id, fight_id, event_id in db.query(models.Fight.id, models.Fight.fight_id, models.Fight.event_id)
+        }
+        fighters = dict(db.query(models.Fighter.fighter_id, models.Fighter.id))
+        already_migrated = set(
+            db.query(models.Pick.user_id, models.Fight.event_id)
+            .join(models.Fight, models.Fight.id == models.Pick.fight_id)
+            .distinct()
+        )
+
+        migrated = skipped = 0
+        for user_picks in db.query(models.UserEventPicks).filter(models.UserEventPicks.picks.isnot(None)):
+            if (user_picks.user_id, user_picks.event_id) not in already_migrated:
+                rows = {}
+                for pick in user_picks.picks:
+                    fight = fights.get(pick.get("fight_id"))
+                    fighter_id = fighters.get(pick.get("fighter_id"))
+                    if not fight or fight[1] != user_picks.event_id or fighter_id is None:
+                        skipped += 1
+                        continue
+                    rows.setdefault(fight[0], {
+                        "user_id": user_picks.user_id,
+                        "fight_id": fight[0],
+                        "fighter_id": fighter_id,
+                        "method": pick.get("method")
+                    })
+                db.bulk_insert_mappings(models.Pick, list(rows.values()))
+                migrated += len(rows)
+            user_picks.picks = None
+
+        scoring.rebuild_scores(db)
+        consensus.rebuild_pick_counts(db)
+        caching.bump(db, caching.PICKS, caching.SCORES)
+        db.commit()
+        print(f"Migrated {migrated} picks ({skipped} skipped as unknown fights or fighters)")
+    finally:
+        db.close()
+
+
+def rebuild_pick_counts():
+    """Check the pick consensus counters against the pick rows and rebuild any that drifted."""
+    db = SessionLocal()
+    try:
+        drifted = consensus.find_drift(db)
+        if drifted:
+            consensus.rebuild_pick_counts(db, drifted)
+            caching.bump(db, caching.PICKS)
+            db.commit()
+        print(f"Rebuilt pick counts for {len(drifted)} fights")
+    finally:
+        db.close()
+
+
+COMMANDS = {
+    "check-query-plans": check_query_plans,
+    "migrate": migrate,
+    "migrate-picks": migrate_picks,
+    "rebuild-pick-counts": rebuild_pick_counts,
+    "rebuild-scores": rebuild_scores,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Punch Picks maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    COMMANDS[args.command]()
+
+
+if __name__ == "__main__":
+    main()
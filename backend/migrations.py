@@ -0,0 +1,340 @@
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Tuple
+
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    UniqueConstraint, func, inspect, select,
+)
+from sqlalchemy.sql import Select
+from sqlalchemy.engine import Connection, Engine
+
+import models
+from database import full_scans
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+# Applied migrations, kept apart from the models' metadata
+version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _frozen_metadata() -> MetaData:
+    """
+    Every table as the migration that created it left it. Frozen: it must
+    not follow the models, which later migrations move on from it. The
+    baseline tables are the schema as it was before any of the migrations
+    after it; indexes later added to them are created by those migrations.
+    """
+    metadata = MetaData()
+
+    # Baseline
+    Table(
+        "fighters", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("fighter_id", String, unique=True, index=True),
+        Column("name", String),
+        Column("nickname", String),
+        Column("record", String),
+        Column("weight_class", String),
+    )
+    Table(
+        "events", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("title", String, index=True),
+        Column("date", Date),
+        Column("location", String),
+        Column("description", Text),
+        Column("start_date", DateTime(timezone=True)),
+        Column("is_active", Boolean),
+    )
+    Table(
+        "fights", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("fight_id", String, unique=True, index=True),
+        Column("event_id", Integer, ForeignKey("events.id")),
+        Column("fighter1_id", Integer, ForeignKey("fighters.id")),
+        Column("fighter2_id", Integer, ForeignKey("fighters.id")),
+        Column("weight_class", String),
+        Column("is_main_event", Boolean),
+        Column("order", Integer),
+    )
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("username", String, unique=True, index=True),
+        Column("password_hash", String),
+        Column("email", String),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("is_active", Boolean),
+    )
+    Table(
+        "picks", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("fight_id", Integer, ForeignKey("fights.id")),
+        Column("fighter_id", Integer, ForeignKey("fighters.id")),
+        Column("method", String),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("updated_at", DateTime(timezone=True)),
+    )
+    Table(
+        "results", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("fight_id", Integer, ForeignKey("fights.id"), unique=True),
+        Column("winner_id", Integer, ForeignKey("fighters.id")),
+        Column("method", String),
+        Column("round", Integer),
+        Column("time", String),
+    )
+    Table(
+        "user_event_picks", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("event_id", Integer, ForeignKey("events.id")),
+        Column("submitted_at", DateTime(timezone=True), server_default=func.now()),
+        Column("picks", String),
+        UniqueConstraint("user_id", "event_id", name="uix_user_event"),
+    )
+
+    # Added by later migrations
+    Table(
+        "user_event_scores", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("event_id", Integer, ForeignKey("events.id")),
+        Column("total_picks", Integer),
+        Column("correct_picks", Float),
+        Column("accuracy_percentage", Float),
+        Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+        UniqueConstraint("user_id", "event_id", name="uix_user_event_score"),
+        Index("ix_user_event_scores_event_accuracy", "event_id", "accuracy_percentage"),
+    )
+    Table(
+        "user_standings", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("season", Integer),
+        Column("events_entered", Integer),
+        Column("total_picks", Integer),
+        Column("correct_picks", Float),
+        Column("accuracy_percentage", Float),
+        UniqueConstraint("user_id", "season", name="uix_user_season"),
+        Index("ix_user_standings_rank", "season", "correct_picks", "accuracy_percentage", "user_id"),
+    )
+    Table(
+        "sessions", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("token_hash", String, unique=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), index=True),
+        Column("username", String),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("expires_at", DateTime, index=True),
+    )
+    Table(
+        "event_locks", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("event_id", Integer, ForeignKey("events.id"), unique=True),
+        Column("locked_at", DateTime(timezone=True), server_default=func.now()),
+        Column("entrants", Integer),
+        Column("total_picks", Integer),
+    )
+    Table(
+        "locked_picks", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("event_id", Integer, ForeignKey("events.id")),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("fight_id", Integer, ForeignKey("fights.id")),
+        Column("fighter_id", Integer, ForeignKey("fighters.id")),
+        Column("method", String),
+        UniqueConstraint("event_id", "user_id", "fight_id", name="uix_locked_pick"),
+        Index("ix_locked_picks_fight_id", "fight_id"),
+    )
+    Table(
+        "pick_counts", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("fight_id", Integer, ForeignKey("fights.id")),
+        Column("fighter_id", Integer, ForeignKey("fighters.id")),
+        Column("method", String),
+        Column("picks", Integer),
+        UniqueConstraint("fight_id", "fighter_id", "method", name="uix_pick_count"),
+    )
+    return metadata
+
+
+BASELINE_TABLES = ("fighters", "events", "fights", "users", "picks", "results", "user_event_picks")
+
+
+def _create_tables(*names: str):
+    # Databases created before migrations existed may already have any of
+    # these tables or their indexes, so create only what is missing
+    def apply(connection: Connection):
+        metadata = _frozen_metadata()
+        for name in names:
+            table = metadata.tables[name]
+            table.create(bind=connection, checkfirst=True)
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+    return apply
+
+
+def _execute(*statements: str):
+    def apply(connection: Connection):
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    return apply
+
+
+# Every schema change, in order. Append new migrations with the next version;
+# never edit one that has shipped. Every database, new or old, runs them in
+# order from the baseline, so each only ever runs against the schema of the
+# version before it. A database created before migrations existed may
+# already have some of what a migration adds, so migrations only create what
+# is missing.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", _create_tables(*BASELINE_TABLES)),
+    Migration(2, "user event scores", _create_tables("user_event_scores")),
+    Migration(3, "user standings", _create_tables("user_standings")),
+    Migration(4, "pick indexes", _execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uix_pick_user_fight ON picks (user_id, fight_id)",
+        "CREATE INDEX IF NOT EXISTS ix_picks_fight_id ON picks (fight_id)",
+    )),
+    Migration(5, "listing indexes", _execute(
+        "CREATE INDEX IF NOT EXISTS ix_events_date_id ON events (date, id)",
+        "CREATE INDEX IF NOT EXISTS ix_fighters_name_id ON fighters (name, id)",
+    )),
+    Migration(6, "sessions", _create_tables("sessions")),
+    Migration(7, "pick locks", _create_tables("event_locks", "locked_picks")),
+    Migration(8, "pick counts", _create_tables("pick_counts")),
+    Migration(9, "hot path indexes", _execute(
+        'CREATE INDEX IF NOT EXISTS ix_fights_event_order ON fights (event_id, "order")',
+        "CREATE INDEX IF NOT EXISTS ix_user_event_picks_event_user ON user_event_picks (event_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_results_winner_id ON results (winner_id)",
+    )),
+    Migration(10, "data versions", _execute(
+        "CREATE TABLE IF NOT EXISTS data_versions "
+        "(scope VARCHAR NOT NULL, version INTEGER, modified INTEGER, PRIMARY KEY (scope))",
+    )),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def current_version(connection: Connection) -> int:
+    """The newest applied migration, or 0 for a database without migrations."""
+    if not inspect(connection).has_table(schema_migrations.name):
+        return 0
+    versions = connection.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def _stamp(connection: Connection, migration: Migration):
+    connection.execute(schema_migrations.insert().values(
+        version=migration.version, name=migration.name, applied_at=datetime.now()
+    ))
+
+
+def migrate(engine: Engine) -> List[Migration]:
+    """
+    Bring the database up to SCHEMA_VERSION, each migration in its own
+    transaction. Returns the migrations applied.
+    """
+    with engine.begin() as connection:
+        version_metadata.create_all(bind=connection)
+
+    applied = []
+    for migration in MIGRATIONS:
+        with engine.begin() as connection:
+            if migration.version <= current_version(connection):
+                continue
+            migration.apply(connection)
+            _stamp(connection, migration)
+        applied.append(migration)
+    return applied
+
+
+def verify(engine: Engine):
+    """Refuse to serve from a database whose schema is not at SCHEMA_VERSION."""
+    with engine.connect() as connection:
+        version = current_version(connection)
+    if version != SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, but this code needs version {SCHEMA_VERSION}. "
+            f"Run `python manage.py migrate` from the backend directory."
+        )
+
+
+class HotQuery(NamedTuple):
+    name: str
+    query: Select
+    indexes: Tuple[str, ...]
+
+
+# The filters the routers run most, and the indexes their plans must use
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery(
+        "event card",
+        select(models.Fight.id).where(models.Fight.event_id == 1).order_by(models.Fight.order),
+        ("ix_fights_event_order",),
+    ),
+    HotQuery(
+        "event entrants",
+        select(models.UserEventPicks.user_id).where(models.UserEventPicks.event_id == 1),
+        ("ix_user_event_picks_event_user",),
+    ),
+    HotQuery(
+        "user's picks on a card",
+        select(models.Pick.id).where(
+            models.Pick.user_id == 1,
+            models.Pick.fight_id.in_(select(models.Fight.id).where(models.Fight.event_id == 1)),
+        ),
+        ("uix_pick_user_fight", "ix_fights_event_order"),
+    ),
+    HotQuery(
+        "fight's picks",
+        select(models.Pick.fighter_id).where(models.Pick.fight_id == 1),
+        ("ix_picks_fight_id",),
+    ),
+    HotQuery(
+        "fighter's wins",
+        select(models.Result.id).where(models.Result.winner_id == 1),
+        ("ix_results_winner_id",),
+    ),
+    HotQuery(
+        "event leaderboard",
+        select(models.UserEventScore.id).where(models.UserEventScore.event_id == 1)
+        .order_by(models.UserEventScore.accuracy_percentage.desc()),
+        ("ix_user_event_scores_event_accuracy",),
+    ),
+]
+
+
+def check_query_plans(connection: Connection) -> List[str]:
+    """
+    Explain each hot query on a SQLite database and return a problem for
+    every plan that scans a table in full or does not use its indexes.
+    """
+    problems = []
+    for hot_query in HOT_QUERIES:
+        statement = hot_query.query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+        plan = "\n".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}"))
+        scanned = full_scans(plan)
+        if scanned:
+            problems.append(f"{hot_query.name}: scans {', '.join(scanned)} in full:\n{plan}")
+        missing = [index for index in hot_query.indexes if index not in plan]
+        if missing:
+            problems.append(f"{hot_query.name}: does not use {', '.join(missing)}:\n{plan}")
+    return problems
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Date, UniqueConstraint
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, Float, String, Text, DateTime, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import TypeDecorator, VARCHAR
@@ -9,6 +9,7 @@ from database import Base
 # JSON type for SQLite (which doesn't natively support JSON)
 class JSONEncodedDict(TypeDecorator):
     impl = VARCHAR
+    cache_ok = True
     
     def process_bind_param(self, value, dialect):
         if value is not None:
@@ -33,6 +34,11 @@ class Fighter(Base):
     # Relationships - not required but helpful for queries
     fights_as_fighter1 = relationship("Fight", foreign_keys="Fight.fighter1_id", back_populates="fighter1")
     fights_as_fighter2 = relationship("Fight", foreign_keys="Fight.fighter2_id", back_populates="fighter2")
+    
+    # Keyset pagination order for fighter listings
+    __table_args__ = (
+        Index('ix_fighters_name_id', 'name', 'id'),
+    )
 
 class Event(Base):
     __tablename__ = "events"
@@ -47,6 +53,11 @@ class Event(Base):
     
     # Relationships
     fights = relationship("Fight", back_populates="event", cascade="all, delete-orphan")
+    
+    # Keyset pagination order for event listings
+    __table_args__ = (
+        Index('ix_events_date_id', 'date', 'id'),
+    )
 
 class Fight(Base):
     __tablename__ = "fights"
@@ -66,6 +77,11 @@ class Fight(Base):
     fighter2 = relationship("Fighter", foreign_keys=[fighter2_id], back_populates="fights_as_fighter2")
     picks = relationship("Pick", back_populates="fight", cascade="all, delete-orphan")
     result = relationship("Result", back_populates="fight", uselist=False, cascade="all, delete-orphan")
+    
+    # An event's card in order
+    __table_args__ = (
+        Index('ix_fights_event_order', 'event_id', 'order'),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -95,6 +111,12 @@ class Pick(Base):
     user = relationship("User", back_populates="picks")
     fight = relationship("Fight", back_populates="picks")
     fighter = relationship("Fighter")
+    
+    # One pick per user per fight, and lookups of a fight's picks
+    __table_args__ = (
+        Index('uix_pick_user_fight', 'user_id', 'fight_id', unique=True),
+        Index('ix_picks_fight_id', 'fight_id'),
+    )
 
 class Result(Base):
     __tablename__ = "results"
@@ -109,6 +131,11 @@ class Result(Base):
     # Relationships
     fight = relationship("Fight", back_populates="result")
     winner = relationship("Fighter")
+    
+    # Lookups of a fighter's wins
+    __table_args__ = (
+        Index('ix_results_winner_id', 'winner_id'),
+    )
 
 class UserEventPicks(Base):
     __tablename__ = "user_event_picks"
@@ -117,13 +144,124 @@ class UserEventPicks(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     event_id = Column(Integer, ForeignKey("events.id"))
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
-    picks = Column(JSONEncodedDict)  # Stores all picks for the event
+    picks = Column(JSONEncodedDict, nullable=True)  # Legacy blob of all picks, superseded by Pick rows
     
     # Relationships
     user = relationship("User")
     event = relationship("Event")
     
-    # Composite unique constraint to ensure one entry per user per event
+    # Composite unique constraint to ensure one entry per user per event, and
+    # an index for listing an event's entrants
     __table_args__ = (
         UniqueConstraint('user_id', 'event_id', name='uix_user_event'),
-    )
\ No newline at end of file
+        Index('ix_user_event_picks_event_user', 'event_id', 'user_id'),
+    )
+
+class UserEventScore(Base):
+    __tablename__ = "user_event_scores"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    event_id = Column(Integer, ForeignKey("events.id"))
+    total_picks = Column(Integer, default=0)
+    correct_picks = Column(Float, default=0)
+    accuracy_percentage = Column(Float, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User")
+    event = relationship("Event")
+    
+    # One score per user per event, and an index for reading an event's board in rank order
+    __table_args__ = (
+        UniqueConstraint('user_id', 'event_id', name='uix_user_event_score'),
+        Index('ix_user_event_scores_event_accuracy', 'event_id', 'accuracy_percentage'),
+    )
+
+class UserStanding(Base):
+    __tablename__ = "user_standings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    season = Column(Integer)  # Calendar year of the events, or 0 for all-time
+    events_entered = Column(Integer, default=0)
+    total_picks = Column(Integer, default=0)
+    correct_picks = Column(Float, default=0)
+    accuracy_percentage = Column(Float, default=0)
+    
+    # Relationships
+    user = relationship("User")
+    
+    # One standing per user per season, and an index matching the ranking order
+    __table_args__ = (
+        UniqueConstraint('user_id', 'season', name='uix_user_season'),
+        Index('ix_user_standings_rank', 'season', 'correct_picks', 'accuracy_percentage', 'user_id'),
+    )
+
+class UserSession(Base):
+    __tablename__ = "sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String, unique=True, index=True)  # SHA-256 of the cookie token
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    username = Column(String)  # Copied so authenticated requests never need the users table
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime, index=True)
+    
+    # Relationships
+    user = relationship("User")
+
+class EventLock(Base):
+    __tablename__ = "event_locks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), unique=True)
+    locked_at = Column(DateTime(timezone=True), server_default=func.now())
+    entrants = Column(Integer, default=0)  # Users with picks when the event locked
+    total_picks = Column(Integer, default=0)
+    
+    # Relationships
+    event = relationship("Event")
+
+class LockedPick(Base):
+    __tablename__ = "locked_picks"
+    
+    # Immutable copy of a pick taken when its event locked; scoring reads
+    # these once the event has started instead of the mutable picks table
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    fight_id = Column(Integer, ForeignKey("fights.id"))
+    fighter_id = Column(Integer, ForeignKey("fighters.id"))
+    method = Column(String)
+    
+    # Scoring reads an event's snapshot by user, and results by fight
+    __table_args__ = (
+        UniqueConstraint('event_id', 'user_id', 'fight_id', name='uix_locked_pick'),
+        Index('ix_locked_picks_fight_id', 'fight_id'),
+    )
+
+class PickCount(Base):
+    __tablename__ = "pick_counts"
+    
+    # How many users picked each fighter by each method in a fight, kept
+    # up to date as picks are submitted so consensus never scans picks
+    id = Column(Integer, primary_key=True)
+    fight_id = Column(Integer, ForeignKey("fights.id"))
+    fighter_id = Column(Integer, ForeignKey("fighters.id"))
+    method = Column(String)
+    picks = Column(Integer, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('fight_id', 'fighter_id', 'method', name='uix_pick_count'),
+    )
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    
+    # Version of each caching scope's data, behind conditional GETs. Bumped
+    # in the same transaction as every write to the scope, so every API
+    # process answers with the same ETag
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+    modified = Column(Integer)  # Unix time of the last change, for Last-Modified
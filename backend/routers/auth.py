@@ -2,13 +2,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Cookie, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from passlib.context import CryptContext
+from typing import Optional
+import hashing
 import models
-from database import get_db
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import sessions
+from database import get_db, get_read_db, read_your_writes
+from writer import writer
 
 router = APIRouter(
     prefix="/auth",
@@ -35,77 +36,89 @@ class UserResponse(BaseModel):
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Save a new user; run by the group commit writer
+def create_user(db: Session, username: str, password_hash: str):
+    # Checked again here, as someone may have taken the name while we hashed
+    if get_user_by_username(db, username):
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    db_user = models.User(
+        username=username, 
+        password_hash=password_hash,
+        is_active=True
+    )
+    db.add(db_user)
+    db.flush()
+    return db_user
+
+# Start a session, saving an upgraded password hash with it; run by the group commit writer
+def save_login(db: Session, user_id: int, new_hash: Optional[str]):
+    db_user = db.get(models.User, user_id)
+    if new_hash:
+        db_user.password_hash = new_hash
+    return sessions.create_session(db, db_user)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# Password hashing runs on its own executor (see hashing.py), so these
+# endpoints are async, hand their reads to the threadpool and their writes
+# to the group commit writer.
 
 # Register endpoint
-@router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+@router.post("/register", response_model=UserResponse, dependencies=[Depends(read_your_writes)])
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     # Check if username already exists
-    db_user = get_user_by_username(db, user.username)
+    db_user = await run_in_threadpool(get_user_by_username, db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = models.User(
-        username=user.username, 
-        password_hash=hashed_password,
-        is_active=True
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    hashed_password = await hashing.hash_password(user.password)
+    return await writer.run(create_user, user.username, hashed_password)
 
 # Get current user endpoint
 @router.get("/me", response_model=UserResponse)
-def get_current_user(request: Request, db: Session = Depends(get_db)):
-    # Get session cookie
-    session_id = request.cookies.get("session")
-    if not session_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    # Find user by session ID (you would typically use a session store)
-    # This is a simplified example - you may need to adapt this to your session management
-    user = db.query(models.User).filter(models.User.username == session_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid session")
-    
-    return user
+def get_current_user(request: Request, db: Session = Depends(get_read_db)):
+    # Resolve the session token from the cookie through the session cache
+    return sessions.get_current_user(request, db)
 
 # Logout endpoint
-@router.post("/logout")
-def logout(response: Response):
+@router.post("/logout", dependencies=[Depends(read_your_writes)])
+async def logout(request: Request, response: Response):
+    # End the session: the token stops working in this process at once, and
+    # in other processes once their cached lookup expires
+    token = request.cookies.get(sessions.SESSION_COOKIE)
+    if token:
+        await writer.run(sessions.end_session, token)
+        sessions.forget_session(token)
+    
     # Clear the session cookie
-    response.delete_cookie(key="session")
+    response.delete_cookie(key=sessions.SESSION_COOKIE)
     return {"message": "Logged out successfully"}
 
 # Update your login endpoint to set a cookie
-@router.post("/login", response_model=UserResponse)
-def login_user(user: UserLogin, response: Response, db: Session = Depends(get_db)):
+@router.post("/login", response_model=UserResponse, dependencies=[Depends(read_your_writes)])
+async def login_user(user: UserLogin, response: Response, db: Session = Depends(get_db)):
     # Find user by username
-    db_user = get_user_by_username(db, user.username)
+    db_user = await run_in_threadpool(get_user_by_username, db, user.username)
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Verify password
-    if not verify_password(user.password, db_user.password_hash):
+    valid, new_hash = await hashing.verify_and_update(user.password, db_user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
-    # Set a simple session cookie with the username
-    # In a real app, you'd use a secure, random session ID
+    # Start a session and set its random token as the cookie, upgrading
+    # hashes made with outdated settings in the same write
+    user_data = {"id": db_user.id, "username": db_user.username}
+    token = await writer.run(save_login, db_user.id, new_hash)
     response.set_cookie(
-        key="session",
-        value=db_user.username,
+        key=sessions.SESSION_COOKIE,
+        value=token,
         httponly=True,
-        max_age=1800,  # 30 minutes
+        max_age=sessions.SESSION_LIFETIME_SECONDS,
         samesite="lax",
         secure=False,  # Set to True in production with HTTPS
     )
     
     # Return user data (without password)
-    return db_user
\ No newline at end of file
+    return user_data
\ No newline at end of file
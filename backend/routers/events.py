@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date
 
+import caching
 import models
-from database import get_db
+import scoring
+from database import get_async_read_db, get_read_db, read_your_writes
+from pagination import paginate
+from writer import writer
 
 router = APIRouter(
     prefix="/events",
@@ -35,9 +40,17 @@ class Event(EventBase):
     class Config:
         orm_mode = True
 
+# Helper function to save a new event; run by the group commit writer
+def save_event(db: Session, event: EventCreate):
+    db_event = models.Event(**event.dict())
+    db.add(db_event)
+    caching.bump(db, caching.EVENTS)
+    db.flush()
+    return db_event
+
 # Create a new event
-@router.post("/", response_model=Event)
-def create_event(event: EventCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=Event, dependencies=[Depends(read_your_writes)])
+async def create_event(event: EventCreate):
     """
     Create a new event with the following information:
     - title: The name of the event
@@ -45,26 +58,33 @@ def create_event(event: EventCreate, db: Session = Depends(get_db)):
     - location: Where the event takes place
     - description: Additional details about the event (optional)
     """
-    db_event = models.Event(**event.dict())
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    db_event = await writer.run(save_event, event)
     return db_event
 
 # Get all events
-@router.get("/", response_model=List[Event])
-def read_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=List[Event], dependencies=[Depends(caching.conditional(caching.EVENTS))])
+async def read_events(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """
-    Retrieve a list of all events.
-    - skip: Number of events to skip (for pagination)
+    Retrieve a list of all events, ordered by date.
+    - skip: Number of events to skip (for offset pagination)
     - limit: Maximum number of events to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
     """
-    events = db.query(models.Event).offset(skip).limit(limit).all()
+    events = await db.run_sync(lambda session: paginate(
+        session.query(models.Event), [models.Event.date, models.Event.id], response,
+        cursor=cursor, skip=skip, limit=limit
+    ))
     return events
 
 # Get a specific event by ID
-@router.get("/{event_id}", response_model=Event)
-def read_event(event_id: int, db: Session = Depends(get_db)):
+@router.get("/{event_id}", response_model=Event, dependencies=[Depends(caching.conditional(caching.EVENTS))])
+def read_event(event_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a specific event by its ID.
     """
@@ -73,13 +93,8 @@ def read_event(event_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Event not found")
     return db_event
 
-# Update an event
-@router.put("/{event_id}", response_model=Event)
-def update_event(event_id: int, event: EventUpdate, db: Session = Depends(get_db)):
-    """
-    Update an event's information by its ID.
-    Only the fields provided will be updated.
-    """
+# Helper function to apply an event update; run by the group commit writer
+def save_event_update(db: Session, event_id: int, event: EventUpdate):
     db_event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if db_event is None:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -89,20 +104,49 @@ def update_event(event_id: int, event: EventUpdate, db: Session = Depends(get_db
     for key, value in update_data.items():
         setattr(db_event, key, value)
     
-    db.commit()
-    db.refresh(db_event)
+    # Moving an event's date can move its scores into another season
+    if "date" in update_data:
+        scoring.rebuild_standings(db)
+    
+    caching.bump(db, caching.EVENTS, caching.SCORES)
+    db.flush()
     return db_event
 
-# Delete an event
-@router.delete("/{event_id}")
-def delete_event(event_id: int, db: Session = Depends(get_db)):
+# Update an event
+@router.put("/{event_id}", response_model=Event, dependencies=[Depends(read_your_writes)])
+async def update_event(event_id: int, event: EventUpdate):
     """
-    Delete an event by its ID.
+    Update an event's information by its ID.
+    Only the fields provided will be updated.
     """
+    db_event = await writer.run(save_event_update, event_id, event)
+    return db_event
+
+# Helper function to delete an event with its card, picks and scores; run by the group commit writer
+def remove_event(db: Session, event_id: int):
     db_event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if db_event is None:
         raise HTTPException(status_code=404, detail="Event not found")
     
+    # Drop the event's scores from the standings while its date is still known
+    scoring.remove_event_scores(db, event_id)
+    
+    # Nothing about the event may outlive it: SQLite can hand its id to the next event created
+    fight_ids = db.query(models.Fight.id).filter(models.Fight.event_id == event_id).scalar_subquery()
+    for model in (models.PickCount, models.Pick, models.Result):
+        db.query(model).filter(model.fight_id.in_(fight_ids)).delete(synchronize_session=False)
+    for model in (models.LockedPick, models.EventLock, models.UserEventPicks, models.Fight):
+        db.query(model).filter(model.event_id == event_id).delete(synchronize_session=False)
     db.delete(db_event)
-    db.commit()
-    return {"message": f"Event {event_id} deleted successfully"}
\ No newline at end of file
+    caching.bump(db, caching.EVENTS, caching.FIGHTS, caching.RESULTS, caching.PICKS, caching.SCORES)
+    db.flush()
+
+# Delete an event
+@router.delete("/{event_id}", dependencies=[Depends(read_your_writes)])
+async def delete_event(event_id: int):
+    """
+    Delete an event by its ID, with its fights, picks, results and scores,
+    and take it out of the standings.
+    """
+    await writer.run(remove_event, event_id)
+    return {"message": f"Event {event_id} deleted successfully"}
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 
+import caching
 import models
-from database import get_db
+from database import get_read_db, read_your_writes
+from pagination import paginate
+from writer import writer
 
 router = APIRouter(
     prefix="/fighters",
@@ -37,9 +40,23 @@ class Fighter(FighterBase):
     class Config:
         orm_mode = True
 
+# Helper function to validate and save a new fighter; run by the group commit writer
+def save_fighter(db: Session, fighter: FighterCreate):
+    # Check if fighter already exists
+    db_fighter = db.query(models.Fighter).filter(models.Fighter.fighter_id == fighter.fighter_id).first()
+    if db_fighter:
+        raise HTTPException(status_code=400, detail="Fighter with this ID already exists")
+    
+    # Create new fighter
+    db_fighter = models.Fighter(**fighter.dict())
+    db.add(db_fighter)
+    caching.bump(db, caching.FIGHTERS)
+    db.flush()
+    return db_fighter
+
 # Create a new fighter
-@router.post("/", response_model=Fighter)
-def create_fighter(fighter: FighterCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=Fighter, dependencies=[Depends(read_your_writes)])
+async def create_fighter(fighter: FighterCreate):
     """
     Create a new fighter with the following information:
     - fighter_id: A unique identifier for the fighter
@@ -48,32 +65,33 @@ def create_fighter(fighter: FighterCreate, db: Session = Depends(get_db)):
     - weight_class: The weight class (optional)
     - record: The fighter's record (optional)
     """
-    # Check if fighter already exists
-    db_fighter = db.query(models.Fighter).filter(models.Fighter.fighter_id == fighter.fighter_id).first()
-    if db_fighter:
-        raise HTTPException(status_code=400, detail="Fighter with this ID already exists")
-    
-    # Create new fighter
-    db_fighter = models.Fighter(**fighter.dict())
-    db.add(db_fighter)
-    db.commit()
-    db.refresh(db_fighter)
+    db_fighter = await writer.run(save_fighter, fighter)
     return db_fighter
 
 # Get all fighters
-@router.get("/", response_model=List[Fighter])
-def read_fighters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=List[Fighter], dependencies=[Depends(caching.conditional(caching.FIGHTERS))])
+def read_fighters(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
     """
-    Retrieve a list of all fighters.
-    - skip: Number of fighters to skip (for pagination)
+    Retrieve a list of all fighters, ordered by name.
+    - skip: Number of fighters to skip (for offset pagination)
     - limit: Maximum number of fighters to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
     """
-    fighters = db.query(models.Fighter).offset(skip).limit(limit).all()
+    fighters = paginate(
+        db.query(models.Fighter), [models.Fighter.name, models.Fighter.id], response,
+        cursor=cursor, skip=skip, limit=limit
+    )
     return fighters
 
 # Get a specific fighter by ID
-@router.get("/{fighter_id}", response_model=Fighter)
-def read_fighter(fighter_id: str, db: Session = Depends(get_db)):
+@router.get("/{fighter_id}", response_model=Fighter, dependencies=[Depends(caching.conditional(caching.FIGHTERS))])
+def read_fighter(fighter_id: str, db: Session = Depends(get_read_db)):
     """
     Retrieve a specific fighter by their fighter_id.
     """
@@ -82,13 +100,8 @@ def read_fighter(fighter_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Fighter not found")
     return db_fighter
 
-# Update a fighter
-@router.put("/{fighter_id}", response_model=Fighter)
-def update_fighter(fighter_id: str, fighter: FighterUpdate, db: Session = Depends(get_db)):
-    """
-    Update a fighter's information by their fighter_id.
-    Only the fields provided will be updated.
-    """
+# Helper function to apply a fighter update; run by the group commit writer
+def save_fighter_update(db: Session, fighter_id: str, fighter: FighterUpdate):
     db_fighter = db.query(models.Fighter).filter(models.Fighter.fighter_id == fighter_id).first()
     if db_fighter is None:
         raise HTTPException(status_code=404, detail="Fighter not found")
@@ -98,20 +111,35 @@ def update_fighter(fighter_id: str, fighter: FighterUpdate, db: Session = Depend
     for key, value in update_data.items():
         setattr(db_fighter, key, value)
     
-    db.commit()
-    db.refresh(db_fighter)
+    caching.bump(db, caching.FIGHTERS)
+    db.flush()
     return db_fighter
 
-# Delete a fighter
-@router.delete("/{fighter_id}")
-def delete_fighter(fighter_id: str, db: Session = Depends(get_db)):
+# Update a fighter
+@router.put("/{fighter_id}", response_model=Fighter, dependencies=[Depends(read_your_writes)])
+async def update_fighter(fighter_id: str, fighter: FighterUpdate):
     """
-    Delete a fighter by their fighter_id.
+    Update a fighter's information by their fighter_id.
+    Only the fields provided will be updated.
     """
+    db_fighter = await writer.run(save_fighter_update, fighter_id, fighter)
+    return db_fighter
+
+# Helper function to delete a fighter; run by the group commit writer
+def remove_fighter(db: Session, fighter_id: str):
     db_fighter = db.query(models.Fighter).filter(models.Fighter.fighter_id == fighter_id).first()
     if db_fighter is None:
         raise HTTPException(status_code=404, detail="Fighter not found")
     
     db.delete(db_fighter)
-    db.commit()
+    caching.bump(db, caching.FIGHTERS, caching.FIGHTS)
+    db.flush()
+
+# Delete a fighter
+@router.delete("/{fighter_id}", dependencies=[Depends(read_your_writes)])
+async def delete_fighter(fighter_id: str):
+    """
+    Delete a fighter by their fighter_id.
+    """
+    await writer.run(remove_fighter, fighter_id)
     return {"message": f"Fighter {fighter_id} deleted successfully"}
\ No newline at end of file
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from pydantic import BaseModel
+from datetime import datetime
 
+import caching
+import consensus
 import models
-from database import get_db
+import scoring
+from database import get_async_read_db, get_read_db, read_your_writes
+from pagination import paginate
+from routers.events import Event
+from routers.user_picks import FightPick, read_event_picks
+from sessions import get_current_user
+from writer import writer
 
 router = APIRouter(
     prefix="/fights",
@@ -59,19 +69,33 @@ class FightWithFighters(Fight):
     class Config:
         orm_mode = True
 
-# Create a new fight
-@router.post("/", response_model=Fight)
-def create_fight(fight: FightCreate, db: Session = Depends(get_db)):
-    """
-    Create a new fight with the following information:
-    - fight_id: A unique identifier for the fight
-    - weight_class: The weight class of the fight
-    - event_id: The ID of the event this fight belongs to
-    - fighter1_id: The ID of the first fighter
-    - fighter2_id: The ID of the second fighter
-    - is_main_event: Whether this is the main event (default: false)
-    - order: The order of the fight on the card (default: 1)
-    """
+class FightResult(BaseModel):
+    id: int
+    winner_id: int
+    method: str
+    round: Optional[int] = None
+    time: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class CardFight(FightWithFighters):
+    result: Optional[FightResult] = None
+
+    class Config:
+        orm_mode = True
+
+class EventCard(BaseModel):
+    event: Event
+    fights: List[CardFight]
+    picks: List[FightPick]
+    submitted_at: Optional[datetime] = None
+
+# Load both fighters with the fights instead of lazily per fight
+with_fighters = (joinedload(models.Fight.fighter1), joinedload(models.Fight.fighter2))
+
+# Helper function to validate and save a new fight; run by the group commit writer
+def save_fight(db: Session, fight: FightCreate):
     # Check if event exists
     event = db.query(models.Event).filter(models.Event.id == fight.event_id).first()
     if not event:
@@ -94,35 +118,125 @@ def create_fight(fight: FightCreate, db: Session = Depends(get_db)):
     # Create new fight
     db_fight = models.Fight(**fight.dict())
     db.add(db_fight)
-    db.commit()
-    db.refresh(db_fight)
+    caching.bump(db, caching.FIGHTS)
+    db.flush()
+    return db_fight
+
+# Create a new fight
+@router.post("/", response_model=Fight, dependencies=[Depends(read_your_writes)])
+async def create_fight(fight: FightCreate):
+    """
+    Create a new fight with the following information:
+    - fight_id: A unique identifier for the fight
+    - weight_class: The weight class of the fight
+    - event_id: The ID of the event this fight belongs to
+    - fighter1_id: The ID of the first fighter
+    - fighter2_id: The ID of the second fighter
+    - is_main_event: Whether this is the main event (default: false)
+    - order: The order of the fight on the card (default: 1)
+    """
+    db_fight = await writer.run(save_fight, fight)
     return db_fight
 
 # Get all fights
-@router.get("/", response_model=List[Fight])
-def read_fights(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=List[Fight], dependencies=[Depends(caching.conditional(caching.FIGHTS))])
+def read_fights(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
     """
-    Retrieve a list of all fights.
-    - skip: Number of fights to skip (for pagination)
+    Retrieve a list of all fights, ordered by ID.
+    - skip: Number of fights to skip (for offset pagination)
     - limit: Maximum number of fights to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
     """
-    fights = db.query(models.Fight).offset(skip).limit(limit).all()
+    fights = paginate(
+        db.query(models.Fight), [models.Fight.id], response,
+        cursor=cursor, skip=skip, limit=limit
+    )
     return fights
 
 # Get all fights with fighter details
-@router.get("/with-fighters", response_model=List[FightWithFighters])
-def read_fights_with_fighters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/with-fighters", response_model=List[FightWithFighters], dependencies=[Depends(caching.conditional(caching.FIGHTS, caching.FIGHTERS))])
+def read_fights_with_fighters(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
     """
-    Retrieve a list of all fights with fighter details included.
-    - skip: Number of fights to skip (for pagination)
+    Retrieve a list of all fights with fighter details included, ordered by ID.
+    - skip: Number of fights to skip (for offset pagination)
     - limit: Maximum number of fights to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
     """
-    fights = db.query(models.Fight).offset(skip).limit(limit).all()
+    fights = paginate(
+        db.query(models.Fight).options(*with_fighters), [models.Fight.id], response,
+        cursor=cursor, skip=skip, limit=limit
+    )
     return fights
 
+# Helper function to load a fight card and the caller's picks
+def load_event_card(db: Session, request: Request, event_id: int):
+    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    fights = (
+        db.query(models.Fight)
+        .options(*with_fighters, joinedload(models.Fight.result))
+        .filter(models.Fight.event_id == event_id)
+        .order_by(models.Fight.order)
+        .all()
+    )
+    
+    # The caller's picks are optional so the card can be shown logged out
+    picks = []
+    submitted_at = None
+    if request.cookies.get("session"):
+        try:
+            user = get_current_user(request, db)
+        except HTTPException:
+            user = None
+        if user:
+            user_picks = db.query(models.UserEventPicks).filter(
+                models.UserEventPicks.user_id == user.id,
+                models.UserEventPicks.event_id == event_id
+            ).first()
+            if user_picks:
+                picks = read_event_picks(db, user.id, event_id)
+                submitted_at = user_picks.submitted_at
+    
+    return {
+        "event": event,
+        "fights": fights,
+        "picks": picks,
+        "submitted_at": submitted_at
+    }
+
+# Get a whole fight card for the fight card page
+@router.get(
+    "/event/{event_id}/card",
+    response_model=EventCard,
+    dependencies=[Depends(caching.conditional(
+        caching.EVENTS, caching.FIGHTS, caching.FIGHTERS, caching.RESULTS, caching.PICKS, per_user=True
+    ))]
+)
+async def read_event_card(event_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Retrieve everything the fight card page needs in one response: the event,
+    its fights in card order with both fighters and any results, and the
+    caller's current picks (empty if not logged in).
+    """
+    return await db.run_sync(load_event_card, request, event_id)
+
 # Get all fights for a specific event
-@router.get("/event/{event_id}", response_model=List[FightWithFighters])
-def read_event_fights(event_id: int, db: Session = Depends(get_db)):
+@router.get("/event/{event_id}", response_model=List[FightWithFighters], dependencies=[Depends(caching.conditional(caching.EVENTS, caching.FIGHTS, caching.FIGHTERS))])
+def read_event_fights(event_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve all fights for a specific event, with fighter details included.
     """
@@ -131,27 +245,22 @@ def read_event_fights(event_id: int, db: Session = Depends(get_db)):
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).order_by(models.Fight.order).all()
+    fights = db.query(models.Fight).options(*with_fighters).filter(models.Fight.event_id == event_id).order_by(models.Fight.order).all()
     return fights
 
 # Get a specific fight by ID
-@router.get("/{fight_id}", response_model=FightWithFighters)
-def read_fight(fight_id: str, db: Session = Depends(get_db)):
+@router.get("/{fight_id}", response_model=FightWithFighters, dependencies=[Depends(caching.conditional(caching.FIGHTS, caching.FIGHTERS))])
+def read_fight(fight_id: str, db: Session = Depends(get_read_db)):
     """
     Retrieve a specific fight by its fight_id, with fighter details included.
     """
-    db_fight = db.query(models.Fight).filter(models.Fight.fight_id == fight_id).first()
+    db_fight = db.query(models.Fight).options(*with_fighters).filter(models.Fight.fight_id == fight_id).first()
     if db_fight is None:
         raise HTTPException(status_code=404, detail="Fight not found")
     return db_fight
 
-# Update a fight
-@router.put("/{fight_id}", response_model=Fight)
-def update_fight(fight_id: str, fight: FightUpdate, db: Session = Depends(get_db)):
-    """
-    Update a fight's information by its fight_id.
-    Only the fields provided will be updated.
-    """
+# Helper function to validate and apply a fight update; run by the group commit writer
+def save_fight_update(db: Session, fight_id: str, fight: FightUpdate):
     db_fight = db.query(models.Fight).filter(models.Fight.fight_id == fight_id).first()
     if db_fight is None:
         raise HTTPException(status_code=404, detail="Fight not found")
@@ -174,24 +283,76 @@ def update_fight(fight_id: str, fight: FightUpdate, db: Session = Depends(get_db
         if not fighter2:
             raise HTTPException(status_code=404, detail="Fighter 2 not found")
     
+    old_event_id = db_fight.event_id
+    old_fighters = {db_fight.fighter1_id, db_fight.fighter2_id}
+    
     # Update fight attributes
     for key, value in update_data.items():
         setattr(db_fight, key, value)
     
-    db.commit()
-    db.refresh(db_fight)
+    fighters = {db_fight.fighter1_id, db_fight.fighter2_id}
+    if db_fight.event_id == old_event_id and fighters == old_fighters:
+        caching.bump(db, caching.FIGHTS)
+        return db_fight
+    
+    # Picks on a fighter who is no longer in the fight are void
+    if fighters != old_fighters:
+        void_picks = db.query(models.Pick.fight_id, models.Pick.fighter_id, models.Pick.method).filter(
+            models.Pick.fight_id == db_fight.id,
+            models.Pick.fighter_id.notin_(fighters)
+        ).all()
+        consensus.apply_pick_changes(db, [tuple(pick) for pick in void_picks], [])
+        db.query(models.Pick).filter(
+            models.Pick.fight_id == db_fight.id,
+            models.Pick.fighter_id.notin_(fighters)
+        ).delete(synchronize_session=False)
+    
+    # A locked snapshot of the fight's picks moves to its new card with it
+    if db_fight.event_id != old_event_id:
+        db.query(models.LockedPick).filter(models.LockedPick.fight_id == db_fight.id).update(
+            {models.LockedPick.event_id: db_fight.event_id}, synchronize_session=False
+        )
+    
+    # Rescore both cards in the same transaction
+    for event_id in {old_event_id, db_fight.event_id}:
+        scoring.refresh_event_scores(db, event_id)
+    caching.bump(db, caching.FIGHTS, caching.PICKS, caching.SCORES)
+    db.flush()
     return db_fight
 
-# Delete a fight
-@router.delete("/{fight_id}")
-def delete_fight(fight_id: str, db: Session = Depends(get_db)):
+# Update a fight
+@router.put("/{fight_id}", response_model=Fight, dependencies=[Depends(read_your_writes)])
+async def update_fight(fight_id: str, fight: FightUpdate):
     """
-    Delete a fight by its fight_id.
+    Update a fight's information by its fight_id.
+    Only the fields provided will be updated. Moving the fight to another
+    event or changing its fighters rescores the events involved, and
+    replacing a fighter voids the picks made on them.
     """
+    db_fight = await writer.run(save_fight_update, fight_id, fight)
+    return db_fight
+
+# Helper function to delete a fight and rescore its event; run by the group commit writer
+def remove_fight(db: Session, fight_id: str):
     db_fight = db.query(models.Fight).filter(models.Fight.fight_id == fight_id).first()
     if db_fight is None:
         raise HTTPException(status_code=404, detail="Fight not found")
     
+    # The fight's picks and result go with it, and its counters and locked picks with them
+    db.query(models.PickCount).filter(models.PickCount.fight_id == db_fight.id).delete(synchronize_session=False)
+    db.query(models.LockedPick).filter(models.LockedPick.fight_id == db_fight.id).delete(synchronize_session=False)
     db.delete(db_fight)
-    db.commit()
-    return {"message": f"Fight {fight_id} deleted successfully"}
\ No newline at end of file
+    
+    # Rescore the event's entrants in the same transaction
+    scoring.refresh_event_scores(db, db_fight.event_id)
+    caching.bump(db, caching.FIGHTS, caching.RESULTS, caching.PICKS, caching.SCORES)
+
+# Delete a fight
+@router.delete("/{fight_id}", dependencies=[Depends(read_your_writes)])
+async def delete_fight(fight_id: str):
+    """
+    Delete a fight by its fight_id, with its picks and result, and rescore
+    its event.
+    """
+    await writer.run(remove_fight, fight_id)
+    return {"message": f"Fight {fight_id} deleted successfully"}
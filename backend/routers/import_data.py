@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from datetime import date
+import json
+import anyio
 
+import caching
 import models
-from database import get_db
+from database import SessionLocal, get_db, read_your_writes
 
 router = APIRouter(
     prefix="/import",
@@ -42,8 +47,107 @@ class ImportResponse(BaseModel):
     fighters_created: int
     fights_created: int
 
+class StreamImportResult(BaseModel):
+    line: int
+    status: str  # "imported" or "failed"
+    event_id: Optional[int] = None
+    title: Optional[str] = None
+    fighters_created: int = 0
+    fights_created: int = 0
+    error: Optional[str] = None
+
+# Maximum number of values bound in a single IN lookup
+IN_BATCH_SIZE = 500
+
+# Helper function to map fighter_ids to database ids, creating missing fighters in bulk
+def resolve_fighters(db: Session, fighters: List[FighterImport]):
+    """
+    Resolve every fighter in one batch of IN lookups and insert the unseen
+    ones with a single bulk insert. Returns (fighter_id -> id map, set of
+    fighter_ids that were created).
+    """
+    unique_fighters = {}
+    for fighter in fighters:
+        unique_fighters.setdefault(fighter.fighter_id, fighter)
+    
+    def lookup(fighter_ids):
+        found = {}
+        for i in range(0, len(fighter_ids), IN_BATCH_SIZE):
+            batch = fighter_ids[i:i + IN_BATCH_SIZE]
+            found.update(db.query(models.Fighter.fighter_id, models.Fighter.id).filter(
+                models.Fighter.fighter_id.in_(batch)
+            ))
+        return found
+    
+    fighters_map = lookup(list(unique_fighters))
+    missing = [fighter_id for fighter_id in unique_fighters if fighter_id not in fighters_map]
+    
+    if missing:
+        db.bulk_insert_mappings(models.Fighter, [unique_fighters[fighter_id].dict() for fighter_id in missing])
+        fighters_map.update(lookup(missing))
+    
+    return fighters_map, set(missing)
+
+# Helper function to import several events with one fighter lookup and bulk inserts
+def import_events(db: Session, events_data: List[EventImport]):
+    """
+    Create the events, their fighters and their fights without committing.
+    Returns one summary dict per event, in order.
+    """
+    db_events = [
+        models.Event(
+            title=event_data.title,
+            date=event_data.date,
+            location=event_data.location,
+            description=event_data.description
+        )
+        for event_data in events_data
+    ]
+    db.add_all(db_events)
+    db.flush()  # Get the event IDs while still in transaction
+    
+    fighters = [
+        fighter
+        for event_data in events_data
+        for fight_data in event_data.fights
+        for fighter in (fight_data.fighter1, fight_data.fighter2)
+    ]
+    fighters_map, created = resolve_fighters(db, fighters)
+    
+    fight_rows = []
+    summaries = []
+    for db_event, event_data in zip(db_events, events_data):
+        # Credit each new fighter to the first event that references it
+        event_created = set()
+        for fight_data in event_data.fights:
+            for fighter in (fight_data.fighter1, fight_data.fighter2):
+                if fighter.fighter_id in created:
+                    created.discard(fighter.fighter_id)
+                    event_created.add(fighter.fighter_id)
+            
+            fight_rows.append({
+                "fight_id": fight_data.fight_id,
+                "event_id": db_event.id,
+                "fighter1_id": fighters_map[fight_data.fighter1.fighter_id],
+                "fighter2_id": fighters_map[fight_data.fighter2.fighter_id],
+                "weight_class": fight_data.weight_class,
+                "is_main_event": fight_data.is_main_event,
+                "order": fight_data.order
+            })
+        
+        summaries.append({
+            "event_id": db_event.id,
+            "title": event_data.title,
+            "fighters_created": len(event_created),
+            "fights_created": len(event_data.fights)
+        })
+    
+    db.bulk_insert_mappings(models.Fight, fight_rows)
+    caching.bump(db, caching.EVENTS, caching.FIGHTERS, caching.FIGHTS)
+    return summaries
+
 # Bulk import endpoint
-@router.post("/event", response_model=ImportResponse)
+@router.post("/event", response_model=ImportResponse, dependencies=[Depends(read_your_writes)])
 def import_event(event_data: EventImport, db: Session = Depends(get_db)):
     """
     Import a complete event with fighters and fights in a single operation.
@@ -53,104 +157,133 @@ def import_event(event_data: EventImport, db: Session = Depends(get_db)):
     3. Create all fights for the event
     """
     try:
-        # Create the event
-        db_event = models.Event(
-            title=event_data.title,
-            date=event_data.date,
-            location=event_data.location,
-            description=event_data.description
-        )
-        db.add(db_event)
-        db.flush()  # Get the event ID while still in transaction
-        
-        # Dict to track fighters we've created
-        fighters_map = {}
-        fighters_created = 0
-        
-        # Create fights and fighters
-        for fight_data in event_data.fights:
-            # Process fighter 1
-            fighter1 = fight_data.fighter1
-            fighter1_id = None
-            
-            if fighter1.fighter_id not in fighters_map:
-                # Check if fighter exists
-                db_fighter1 = db.query(models.Fighter).filter(
-                    models.Fighter.fighter_id == fighter1.fighter_id
-                ).first()
-                
-                if not db_fighter1:
-                    # Create new fighter
-                    db_fighter1 = models.Fighter(
-                        fighter_id=fighter1.fighter_id,
-                        name=fighter1.name,
-                        nickname=fighter1.nickname,
-                        weight_class=fighter1.weight_class,
-                        record=fighter1.record
-                    )
-                    db.add(db_fighter1)
-                    db.flush()
-                    fighters_created += 1
-                
-                fighters_map[fighter1.fighter_id] = db_fighter1.id
-            
-            fighter1_id = fighters_map[fighter1.fighter_id]
-            
-            # Process fighter 2
-            fighter2 = fight_data.fighter2
-            fighter2_id = None
-            
-            if fighter2.fighter_id not in fighters_map:
-                # Check if fighter exists
-                db_fighter2 = db.query(models.Fighter).filter(
-                    models.Fighter.fighter_id == fighter2.fighter_id
-                ).first()
-                
-                if not db_fighter2:
-                    # Create new fighter
-                    db_fighter2 = models.Fighter(
-                        fighter_id=fighter2.fighter_id,
-                        name=fighter2.name,
-                        nickname=fighter2.nickname,
-                        weight_class=fighter2.weight_class,
-                        record=fighter2.record
-                    )
-                    db.add(db_fighter2)
-                    db.flush()
-                    fighters_created += 1
-                
-                fighters_map[fighter2.fighter_id] = db_fighter2.id
-            
-            fighter2_id = fighters_map[fighter2.fighter_id]
-            
-            # Create the fight
-            db_fight = models.Fight(
-                fight_id=fight_data.fight_id,
-                event_id=db_event.id,
-                fighter1_id=fighter1_id,
-                fighter2_id=fighter2_id,
-                weight_class=fight_data.weight_class,
-                is_main_event=fight_data.is_main_event,
-                order=fight_data.order
-            )
-            db.add(db_fight)
+        summary = import_events(db, [event_data])[0]
         
         # Commit all changes if everything is successful
         db.commit()
         
         return {
-            "event_id": db_event.id,
+            "event_id": summary["event_id"],
             "message": f"Event '{event_data.title}' imported successfully",
-            "fighters_created": fighters_created,
-            "fights_created": len(event_data.fights)
+            "fighters_created": summary["fighters_created"],
+            "fights_created": summary["fights_created"]
         }
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
 
+# Helper function to commit one chunk of parsed events, falling back to one event at a time
+def import_chunk(chunk):
+    """
+    Import a chunk of (line number, EventImport) pairs in one transaction.
+    If the chunk fails, each event is retried in its own transaction so a
+    single bad event does not reject the rest of the chunk.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            summaries = import_events(db, [event_data for _, event_data in chunk])
+            db.commit()
+            return [
+                StreamImportResult(line=line, status="imported", **summary)
+                for (line, _), summary in zip(chunk, summaries)
+            ]
+        except Exception:
+            db.rollback()
+            if len(chunk) == 1:
+                raise
+        
+        results = []
+        for line, event_data in chunk:
+            try:
+                summary = import_events(db, [event_data])[0]
+                db.commit()
+                results.append(StreamImportResult(line=line, status="imported", **summary))
+            except Exception as e:
+                db.rollback()
+                results.append(StreamImportResult(line=line, status="failed", title=event_data.title, error=str(e)))
+        return results
+    except Exception as e:
+        return [
+            StreamImportResult(line=line, status="failed", title=event_data.title, error=str(e))
+            for line, event_data in chunk
+        ]
+    finally:
+        db.close()
+
+# Streaming response that leaves the request body to the body iterator
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse normally listens for client disconnects by reading
+    from receive(), which would swallow the request body chunks the import
+    is still reading. Wait to be cancelled instead once streaming is done.
+    """
+    async def listen_for_disconnect(self, receive):
+        await anyio.sleep_forever()
+
+# Streaming multi-event import endpoint
+@router.post("/events/stream")
+async def import_events_stream(request: Request, chunk_size: int = Query(50, ge=1, le=1000)):
+    """
+    Import many events from an NDJSON request body (one EventImport per line).
+    - chunk_size: Number of events committed per transaction
+    
+    Fighters for a whole chunk are resolved with batched IN lookups and
+    fighters and fights are bulk inserted. The response is an NDJSON stream
+    with one result per input line, emitted as each chunk commits, followed
+    by a summary line.
+    """
+    async def read_lines():
+        buffer = b""
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line
+        if buffer:
+            yield buffer
+    
+    async def run_import():
+        imported = failed = 0
+        chunk = []
+        
+        async def flush_chunk():
+            results = await run_in_threadpool(import_chunk, chunk[:])
+            chunk.clear()
+            return results
+        
+        line_number = 0
+        async for raw_line in read_lines():
+            line_number += 1
+            if not raw_line.strip():
+                continue
+            
+            try:
+                chunk.append((line_number, EventImport.parse_raw(raw_line)))
+            except ValidationError as e:
+                failed += 1
+                yield StreamImportResult(line=line_number, status="failed", error=str(e)).json() + "\n"
+                continue
+            
+            if len(chunk) >= chunk_size:
+                for result in await flush_chunk():
+                    imported += result.status == "imported"
+                    failed += result.status == "failed"
+                    yield result.json() + "\n"
+        
+        if chunk:
+            for result in await flush_chunk():
+                imported += result.status == "imported"
+                failed += result.status == "failed"
+                yield result.json() + "\n"
+        
+        yield json.dumps({"status": "done", "events_imported": imported, "events_failed": failed}) + "\n"
+    
+    return RequestStreamingResponse(run_import(), media_type="application/x-ndjson")
+
 # Sample data import endpoint (for testing/development)
-@router.post("/sample-data", response_model=ImportResponse)
+@router.post("/sample-data", response_model=ImportResponse, dependencies=[Depends(read_your_writes)])
 def import_sample_data(db: Session = Depends(get_db)):
     """
     Import a sample UFC event with fighters and fights.
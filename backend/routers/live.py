@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import broadcast
+import models
+from database import get_async_read_db
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+    responses={404: {"description": "Not found"}}
+)
+
+# Stream an event's result postings and leaderboard changes
+@router.get("/events/{event_id}")
+async def stream_event(event_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Server-Sent Events stream for one event. Sends "subscribed" once, then
+    "result" for each result posted or updated on the card, and
+    "leaderboard" with the entries whose rank moved, the new scores of
+    entries that kept their rank, and the user ids that dropped off (see
+    broadcast.rank_changes). Load the full leaderboard after "subscribed"
+    to have a base to apply changes to.
+    """
+    event = await db.get(models.Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    # Release the connection; the stream can stay open for hours
+    await db.close()
+
+    return StreamingResponse(
+        broadcast.feed.stream(event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
+import broadcast
+import caching
 import models
-from database import get_db
+import scoring
+from database import get_async_read_db, get_read_db, read_your_writes
+from writer import writer
 
 router = APIRouter(
     prefix="/results",
@@ -29,9 +34,28 @@ class Result(BaseModel):
     class Config:
         orm_mode = True
 
-# Submit a fight result
-@router.post("/", response_model=Result)
-def submit_result(result: ResultCreate, db: Session = Depends(get_db)):
+# Rescore an event's entrants, returning the leaderboard changes if anyone is watching it live
+def rescore_event(db: Session, event_id: int) -> Optional[dict]:
+    if not broadcast.feed.has_subscribers(event_id):
+        scoring.refresh_event_scores(db, event_id)
+        return None
+    
+    db.flush()
+    before = scoring.read_event_leaderboard(db, event_id)
+    scoring.refresh_event_scores(db, event_id)
+    db.flush()
+    return broadcast.rank_changes(before, scoring.read_event_leaderboard(db, event_id))
+
+# Push committed results and the leaderboard changes they caused to live subscribers
+def publish_results(db_results: List[models.Result], event_id: int, changes: Dict[int, Optional[dict]]):
+    for db_result in db_results:
+        broadcast.feed.publish(event_id, "result", {"event_id": event_id, "result": Result.model_validate(db_result, from_attributes=True).model_dump()})
+    for changed_event_id, leaderboard in changes.items():
+        if leaderboard and (leaderboard["changed"] or leaderboard["scores"] or leaderboard["removed"]):
+            broadcast.feed.publish(changed_event_id, "leaderboard", dict(leaderboard, event_id=changed_event_id))
+
+# Helper function to validate and save a new result; run by the group commit writer
+def save_result(db: Session, result: ResultCreate):
     # Check if fight exists
     fight = db.query(models.Fight).filter(models.Fight.id == result.fight_id).first()
     if not fight:
@@ -49,170 +73,180 @@ def submit_result(result: ResultCreate, db: Session = Depends(get_db)):
     # Create result
     db_result = models.Result(**result.dict())
     db.add(db_result)
-    db.commit()
-    db.refresh(db_result)
+    
+    # Rescore the event's entrants in the same transaction
+    changes = {fight.event_id: rescore_event(db, fight.event_id)}
+    caching.bump(db, caching.RESULTS, caching.SCORES)
+    db.flush()
+    return db_result, fight.event_id, changes
+
+# Submit a fight result
+@router.post("/", response_model=Result, dependencies=[Depends(read_your_writes)])
+async def submit_result(result: ResultCreate):
+    db_result, event_id, changes = await writer.run(save_result, result)
+    publish_results([db_result], event_id, changes)
     return db_result
 
+# Helper function to validate and save every result on a card; run by the group commit writer
+def save_event_results(db: Session, event_id: int, results: List[ResultCreate]):
+    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    # Load the card's fights and their existing results in one query each
+    fights = {fight.id: fight for fight in db.query(models.Fight).filter(models.Fight.event_id == event_id)}
+    existing = {
+        fight_id
+        for (fight_id,) in db.query(models.Result.fight_id).filter(models.Result.fight_id.in_(list(fights)))
+    }
+    
+    seen = set()
+    for result in results:
+        fight = fights.get(result.fight_id)
+        if not fight:
+            raise HTTPException(status_code=404, detail=f"Fight {result.fight_id} not found on this event's card")
+        if result.fight_id in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate result for fight {result.fight_id}")
+        seen.add(result.fight_id)
+        if result.fight_id in existing:
+            raise HTTPException(status_code=400, detail=f"Result already exists for fight {result.fight_id}")
+        if result.winner_id not in [fight.fighter1_id, fight.fighter2_id]:
+            raise HTTPException(status_code=400, detail=f"Winner of fight {result.fight_id} must be one of the fighters in the fight")
+    
+    db_results = [models.Result(**result.dict()) for result in results]
+    db.add_all(db_results)
+    
+    # Rescore the event's entrants once for the whole card
+    changes = {event_id: rescore_event(db, event_id)}
+    caching.bump(db, caching.RESULTS, caching.SCORES)
+    db.flush()
+    return db_results, changes
+
+# Submit the results for every fight on an event's card at once
+@router.post("/event/{event_id}", response_model=List[Result], dependencies=[Depends(read_your_writes)])
+async def submit_event_results(event_id: int, results: List[ResultCreate]):
+    """
+    Post several results for one event in a single transaction. The whole
+    batch is rejected if any result fails validation.
+    """
+    if not results:
+        raise HTTPException(status_code=400, detail="No results provided")
+    
+    db_results, changes = await writer.run(save_event_results, event_id, results)
+    publish_results(db_results, event_id, changes)
+    return db_results
+
 # Get result for a fight
-@router.get("/fight/{fight_id}", response_model=Result)
-def get_fight_result(fight_id: int, db: Session = Depends(get_db)):
+@router.get("/fight/{fight_id}", response_model=Result, dependencies=[Depends(caching.conditional(caching.RESULTS))])
+def get_fight_result(fight_id: int, db: Session = Depends(get_read_db)):
     result = db.query(models.Result).filter(models.Result.fight_id == fight_id).first()
     if not result:
         raise HTTPException(status_code=404, detail="No result found for this fight")
     return result
 
 # Add to results.py
-@router.get("/accuracy/{user_id}/{event_id}")
-def calculate_accuracy(user_id: int, event_id: int, db: Session = Depends(get_db)):
-    # Get user's picks for the event
-    user_picks = db.query(models.UserEventPicks).filter(
-        models.UserEventPicks.user_id == user_id,
-        models.UserEventPicks.event_id == event_id
+@router.get("/accuracy/{user_id}/{event_id}", dependencies=[Depends(caching.conditional(caching.SCORES))])
+def calculate_accuracy(user_id: int, event_id: int, db: Session = Depends(get_read_db)):
+    # Read the user's materialized score for the event
+    score = db.query(models.UserEventScore).filter(
+        models.UserEventScore.user_id == user_id,
+        models.UserEventScore.event_id == event_id
     ).first()
     
-    if not user_picks:
+    if not score:
         raise HTTPException(status_code=404, detail="No picks found")
     
-    # Get all results for this event
-    fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).all()
-    
-    total_picks = 0
-    correct_picks = 0
-    
-    for fight in fights:
-        # Check if user made a pick for this fight
-        user_pick = next((p for p in user_picks.picks if p["fight_id"] == fight.fight_id), None)
-        if not user_pick:
-            continue
-            
-        total_picks += 1
-        
-        # Get fight result
-        result = db.query(models.Result).filter(models.Result.fight_id == fight.id).first()
-        if not result:
-            continue
-            
-        # Check if pick is correct
-        if user_pick["fighter_id"] == result.winner.fighter_id:
-            correct_picks += 1
-            
-        # Bonus points for correct method prediction
-        if user_pick["method"] == result.method:
-            correct_picks += 0.5
-    
-    accuracy = (correct_picks / total_picks * 100) if total_picks > 0 else 0
-    
     return {
         "user_id": user_id,
         "event_id": event_id,
-        "total_picks": total_picks,
-        "correct_picks": correct_picks,
-        "accuracy_percentage": accuracy
+        "total_picks": score.total_picks,
+        "correct_picks": score.correct_picks,
+        "accuracy_percentage": score.accuracy_percentage
     }
 
 
-@router.get("/leaderboard/{event_id}")
-def get_event_leaderboard(event_id: int, db: Session = Depends(get_db)):
+@router.get("/leaderboard/{event_id}", dependencies=[Depends(caching.conditional(caching.SCORES))])
+async def get_event_leaderboard(event_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get leaderboard for a specific event with user accuracy"""
     
-    # Get all users who submitted picks for this event
-    user_picks = db.query(models.UserEventPicks).filter(
-        models.UserEventPicks.event_id == event_id
-    ).all()
+    # Read the materialized scores in rank order
+    leaderboard = await db.run_sync(scoring.read_event_leaderboard, event_id)
     
-    if not user_picks:
+    if not leaderboard:
         raise HTTPException(status_code=404, detail="No picks found for this event")
     
-    leaderboard = []
-    
-    for pick in user_picks:
-        # Calculate accuracy for each user
-        accuracy_result = calculate_user_accuracy(pick.user_id, event_id, db)
-        
-        # Get user info
-        user = db.query(models.User).filter(models.User.id == pick.user_id).first()
-        
-        leaderboard.append({
-            "rank": 0,  # Will be set after sorting
-            "user_id": pick.user_id,
-            "username": user.username,
-            "total_picks": accuracy_result["total_picks"],
-            "correct_picks": accuracy_result["correct_picks"],
-            "accuracy_percentage": accuracy_result["accuracy_percentage"]
-        })
-    
-    # Sort by accuracy (highest first)
-    leaderboard.sort(key=lambda x: x["accuracy_percentage"], reverse=True)
-    
-    # Assign ranks
-    for i, entry in enumerate(leaderboard):
-        entry["rank"] = i + 1
-    
     return {
         "event_id": event_id,
         "leaderboard": leaderboard
     }
 
-# Helper function to calculate accuracy (extracted from your existing endpoint)
-def calculate_user_accuracy(user_id: int, event_id: int, db: Session):
-    # Get user's picks for the event
-    user_picks = db.query(models.UserEventPicks).filter(
-        models.UserEventPicks.user_id == user_id,
-        models.UserEventPicks.event_id == event_id
-    ).first()
-    
-    if not user_picks:
-        return {
-            "total_picks": 0,
-            "correct_picks": 0,
-            "accuracy_percentage": 0
-        }
-    
-    # Get all results for this event
-    fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).all()
-    
-    total_picks = 0
-    correct_picks = 0
-    
-    for fight in fights:
-        # Check if user made a pick for this fight
-        user_pick = next((p for p in user_picks.picks if p["fight_id"] == fight.fight_id), None)
-        if not user_pick:
-            continue
-            
-        total_picks += 1
-        
-        # Get fight result
-        result = db.query(models.Result).filter(models.Result.fight_id == fight.id).first()
-        if not result:
-            continue
-            
-        # Check if pick is correct
-        if user_pick["fighter_id"] == result.winner.fighter_id:
-            correct_picks += 1
-            
-        # Bonus points for correct method prediction
-        if user_pick["method"] == result.method:
-            correct_picks += 0.5
-    
-    accuracy = (correct_picks / total_picks * 100) if total_picks > 0 else 0
-    
+# Season and all-time standings
+@router.get("/standings/all-time", dependencies=[Depends(caching.conditional(caching.SCORES))])
+def get_all_time_standings(skip: int = 0, limit: int = 10, db: Session = Depends(get_read_db)):
+    """
+    Get the all-time leaderboard across every event.
+    - skip: Number of ranked users to skip
+    - limit: Maximum number of ranked users to return
+    """
     return {
-        "total_picks": total_picks,
-        "correct_picks": correct_picks,
-        "accuracy_percentage": accuracy
+        "season": None,
+        "leaderboard": scoring.read_standings(db, scoring.ALL_TIME, limit=limit, offset=skip)
     }
 
-# Update a fight result
-@router.put("/{result_id}", response_model=Result)
-def update_result(result_id: int, result: ResultCreate, db: Session = Depends(get_db)):
+@router.get("/standings/season/{season}", dependencies=[Depends(caching.conditional(caching.SCORES))])
+def get_season_standings(season: int, skip: int = 0, limit: int = 10, db: Session = Depends(get_read_db)):
+    """
+    Get the leaderboard for a season (the calendar year of the events).
+    - skip: Number of ranked users to skip
+    - limit: Maximum number of ranked users to return
+    """
+    return {
+        "season": season,
+        "leaderboard": scoring.read_standings(db, season, limit=limit, offset=skip)
+    }
+
+@router.get("/standings/rank/{user_id}", dependencies=[Depends(caching.conditional(caching.SCORES))])
+def get_user_rank(user_id: int, season: Optional[int] = None, db: Session = Depends(get_read_db)):
+    """
+    Get a user's rank in a season's standings, or all-time if no season is given.
+    """
+    entry = scoring.read_user_rank(db, user_id, season if season is not None else scoring.ALL_TIME)
+    if not entry:
+        raise HTTPException(status_code=404, detail="User has no ranked picks")
+    
+    entry["season"] = season
+    return entry
+
+# Helper function to calculate accuracy (extracted from your existing endpoint)
+def calculate_user_accuracy(user_id: int, event_id: int, db: Session):
+    # Score the user's pick rows against the event's results in one query
+    return scoring.score_event(db, event_id, user_id=user_id).get(user_id, dict(scoring.EMPTY_SCORE))
+
+# Helper function to apply a result update; run by the group commit writer
+def save_result_update(db: Session, result_id: int, result: ResultCreate):
     db_result = db.query(models.Result).filter(models.Result.id == result_id).first()
     if not db_result:
         raise HTTPException(status_code=404, detail="Result not found")
     
+    # Remember which event the result belonged to before it changes
+    old_fight = db.query(models.Fight).filter(models.Fight.id == db_result.fight_id).first()
+    
     for key, value in result.dict().items():
         setattr(db_result, key, value)
     
-    db.commit()
-    db.refresh(db_result)
-    return db_result
\ No newline at end of file
+    # Rescore the affected events' entrants in the same transaction
+    new_fight = db.query(models.Fight).filter(models.Fight.id == db_result.fight_id).first()
+    event_ids = {fight.event_id for fight in (old_fight, new_fight) if fight}
+    changes = {event_id: rescore_event(db, event_id) for event_id in event_ids}
+    caching.bump(db, caching.RESULTS, caching.SCORES)
+    
+    db.flush()
+    return db_result, new_fight.event_id if new_fight else None, changes
+
+# Update a fight result
+@router.put("/{result_id}", response_model=Result, dependencies=[Depends(read_your_writes)])
+async def update_result(result_id: int, result: ResultCreate):
+    db_result, event_id, changes = await writer.run(save_result_update, result_id, result)
+    if event_id is not None:
+        publish_results([db_result], event_id, changes)
+    return db_result
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
+import caching
+import consensus
+import locking
 import models
-from database import get_db
+import scoring
+from database import get_async_read_db, read_your_writes, upsert
+from sessions import get_current_user
+from writer import writer
 
 router = APIRouter(
     prefix="/picks",
@@ -31,29 +38,70 @@ class EventPicksResponse(BaseModel):
     class Config:
         orm_mode = True
 
-# Helper function to get current user from session
-def get_current_user(request: Request, db: Session):
-    session_id = request.cookies.get("session")
-    if not session_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    user = db.query(models.User).filter(models.User.username == session_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid session")
-    
-    return user
+# Helper function to read a user's pick rows for an event in card order
+def read_event_picks(db: Session, user_id: int, event_id: int):
+    rows = (
+        db.query(models.Fight.fight_id, models.Fighter.fighter_id, models.Pick.method)
+        .join(models.Fight, models.Fight.id == models.Pick.fight_id)
+        .join(models.Fighter, models.Fighter.id == models.Pick.fighter_id)
+        .filter(models.Pick.user_id == user_id, models.Fight.event_id == event_id)
+        .order_by(models.Fight.order, models.Fight.id)
+        .all()
+    )
+    return [
+        {"fight_id": fight_id, "fighter_id": fighter_id, "method": method}
+        for fight_id, fighter_id, method in rows
+    ]
 
-# Get current user's picks for an event
-@router.get("/event/{event_id}", response_model=EventPicksResponse)
-def get_user_picks(
-    event_id: int,
-    request: Request,
-    db: Session = Depends(get_db)
-):
+# Helper function to load an event's fights with both fighters in one query
+def load_event_fighters(db: Session, event_id: int):
     """
-    Get a user's picks for a specific event.
-    This will return an empty list if no picks have been submitted yet.
+    Returns a dict keyed by fight.fight_id whose value is
+    (fight.id, {fighter.fighter_id: fighter.id} for both fighters).
     """
+    fighter1 = aliased(models.Fighter)
+    fighter2 = aliased(models.Fighter)
+    rows = (
+        db.query(models.Fight.id, models.Fight.fight_id, fighter1.fighter_id, fighter1.id, fighter2.fighter_id, fighter2.id)
+        .join(fighter1, fighter1.id == models.Fight.fighter1_id)
+        .join(fighter2, fighter2.id == models.Fight.fighter2_id)
+        .filter(models.Fight.event_id == event_id)
+        .all()
+    )
+    return {
+        fight_id: (fight_pk, {fighter1_id: fighter1_pk, fighter2_id: fighter2_pk})
+        for fight_pk, fight_id, fighter1_id, fighter1_pk, fighter2_id, fighter2_pk in rows
+    }
+
+# Helper function to replace a user's pick rows for an event
+def write_event_picks(db: Session, user_id: int, event_id: int, pick_rows: List[Dict[str, Any]]):
+    picked_fight_ids = [row["fight_id"] for row in pick_rows]
+    event_fight_ids = db.query(models.Fight.id).filter(models.Fight.event_id == event_id).scalar_subquery()
+    
+    # Move the consensus counters from the user's previous picks to the new ones
+    old_picks = db.query(models.Pick.fight_id, models.Pick.fighter_id, models.Pick.method).filter(
+        models.Pick.user_id == user_id,
+        models.Pick.fight_id.in_(event_fight_ids)
+    ).all()
+    consensus.apply_pick_changes(
+        db, [tuple(pick) for pick in old_picks],
+        [(row["fight_id"], row["fighter_id"], row["method"]) for row in pick_rows]
+    )
+    
+    db.query(models.Pick).filter(
+        models.Pick.user_id == user_id,
+        models.Pick.fight_id.in_(event_fight_ids),
+        models.Pick.fight_id.notin_(picked_fight_ids)
+    ).delete(synchronize_session=False)
+    
+    if pick_rows:
+        db.execute(upsert(
+            db, models.Pick, [dict(row, user_id=user_id) for row in pick_rows],
+            ["user_id", "fight_id"], ["fighter_id", "method"]
+        ))
+
+# Helper function to load the caller's picks for an event
+def load_user_picks(db: Session, request: Request, event_id: int):
     # Get current user from session
     user = get_current_user(request, db)
     
@@ -76,21 +124,43 @@ def get_user_picks(
             "submitted_at": datetime.now()
         }
     
-    return user_picks
+    return {
+        "event_id": event_id,
+        "picks": read_event_picks(db, user.id, event_id),
+        "submitted_at": user_picks.submitted_at
+    }
 
-# Submit picks for an event
-@router.post("/event/{event_id}", response_model=EventPicksResponse)
-def submit_user_picks(
+# Get current user's picks for an event
+@router.get("/event/{event_id}", response_model=EventPicksResponse)
+async def get_user_picks(
     event_id: int,
-    picks_data: List[FightPick],
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Submit or update a user's picks for an event.
-    - Each user can only have one set of picks per event
-    - Picks cannot be changed after the event start date
+    Get a user's picks for a specific event.
+    This will return an empty list if no picks have been submitted yet.
+    """
+    return await db.run_sync(load_user_picks, request, event_id)
+
+# Get how everyone picked each fight on an event's card
+@router.get("/event/{event_id}/consensus", dependencies=[Depends(caching.conditional(caching.FIGHTS, caching.PICKS))])
+async def get_event_consensus(event_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Get the pick distribution for every fight on an event's card: the share
+    of users who picked each fighter and each method.
     """
+    fights = await db.run_sync(consensus.read_card_consensus, event_id)
+    if not fights:
+        raise HTTPException(status_code=404, detail="No fights found for this event")
+    
+    return {
+        "event_id": event_id,
+        "fights": fights
+    }
+
+# Helper function to validate and save a user's picks; run by the group commit writer
+def save_user_picks(db: Session, request: Request, event_id: int, picks_data: List[FightPick]):
     # Get current user from session
     user = get_current_user(request, db)
     
@@ -103,54 +173,81 @@ def submit_user_picks(
     if getattr(event, 'is_active', True) is False:
         raise HTTPException(status_code=400, detail="Event is not active")
     
-    # Check if event has started
-    if getattr(event, 'start_date', None) and event.start_date < datetime.now():
+    # Check if event has started, or was locked by the scheduler
+    if locking.has_started(event) or scoring.is_locked(db, event_id):
         raise HTTPException(status_code=400, detail="Event has already started - picks are locked")
     
-    # Validate that all fight_ids belong to this event
-    event_fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).all()
-    event_fight_ids = [fight.fight_id for fight in event_fights]
+    # Load the card's fights and both fighters once, then validate in memory
+    event_fights = load_event_fighters(db, event_id)
     
+    # Validate that all fight_ids belong to this event
     for pick in picks_data:
-        if pick.fight_id not in event_fight_ids:
+        if pick.fight_id not in event_fights:
             raise HTTPException(status_code=400, detail=f"Fight {pick.fight_id} does not belong to this event")
     
-    # Validate that all fighter_ids exist
-    for pick in picks_data:
-        fighter = db.query(models.Fighter).filter(models.Fighter.fighter_id == pick.fighter_id).first()
-        if not fighter:
+    # Validate that each picked fighter is in the picked fight
+    invalid_picks = [pick for pick in picks_data if pick.fighter_id not in event_fights[pick.fight_id][1]]
+    if invalid_picks:
+        # Only the error path needs to know whether the fighter exists at all
+        known_fighters = {
+            fighter_id for (fighter_id,) in db.query(models.Fighter.fighter_id).filter(
+                models.Fighter.fighter_id.in_({pick.fighter_id for pick in invalid_picks})
+            )
+        }
+        pick = invalid_picks[0]
+        if pick.fighter_id not in known_fighters:
             raise HTTPException(status_code=400, detail=f"Fighter {pick.fighter_id} not found")
+        raise HTTPException(status_code=400, detail=f"Fighter {pick.fighter_id} is not in fight {pick.fight_id}")
     
-    # Convert picks to a format suitable for storing in JSONEncodedDict
+    # Convert picks to pick rows keyed on integer ids, keeping the first pick per fight
     picks_list = []
+    pick_rows = {}
     for pick in picks_data:
+        fight_pk, fighters = event_fights[pick.fight_id]
+        if fight_pk in pick_rows:
+            continue
+        pick_rows[fight_pk] = {
+            "fight_id": fight_pk,
+            "fighter_id": fighters[pick.fighter_id],
+            "method": pick.method
+        }
         picks_list.append({
             "fight_id": pick.fight_id,
             "fighter_id": pick.fighter_id,
             "method": pick.method
         })
     
-    # Check if user already has picks for this event
-    existing_picks = db.query(models.UserEventPicks).filter(
-        models.UserEventPicks.user_id == user.id,
-        models.UserEventPicks.event_id == event_id
-    ).first()
+    # Create or update the submission in one statement; the legacy blob is
+    # cleared once picks live in rows
+    submitted_at = datetime.now()
+    db.execute(upsert(
+        db, models.UserEventPicks,
+        [{"user_id": user.id, "event_id": event_id, "submitted_at": submitted_at, "picks": None}],
+        ["user_id", "event_id"], ["submitted_at", "picks"]
+    ))
+    
+    write_event_picks(db, user.id, event_id, list(pick_rows.values()))
+    scoring.refresh_user_event_score(db, user.id, event_id)
+    caching.bump(db, caching.PICKS, caching.SCORES)
     
-    if existing_picks:
-        # Update existing picks
-        existing_picks.picks = picks_list
-        existing_picks.submitted_at = datetime.now()
-        db.commit()
-        db.refresh(existing_picks)
-        return existing_picks
-    else:
-        # Create new picks
-        new_picks = models.UserEventPicks(
-            user_id=user.id,
-            event_id=event_id,
-            picks=picks_list
-        )
-        db.add(new_picks)
-        db.commit()
-        db.refresh(new_picks)
-        return new_picks
\ No newline at end of file
+    return {
+        "event_id": event_id,
+        "picks": picks_list,
+        "submitted_at": submitted_at
+    }
+
+# Submit picks for an event
+@router.post("/event/{event_id}", response_model=EventPicksResponse, dependencies=[Depends(read_your_writes)])
+async def submit_user_picks(
+    event_id: int,
+    picks_data: List[FightPick],
+    request: Request
+):
+    """
+    Submit or update a user's picks for an event.
+    - Each user can only have one set of picks per event
+    - Picks cannot be changed after the event start date
+    """
+    # Queued with other submissions and committed together in one transaction
+    response = await writer.run(save_user_picks, request, event_id, picks_data)
+    return response
@@ -0,0 +1,316 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+import models
+
+# Points awarded for a correct winner and for a correct method
+WINNER_POINTS = 1
+METHOD_POINTS = 0.5
+
+# Season key used for the all-time standings
+ALL_TIME = 0
+
+
+def _score(total_picks: int, correct_picks: float) -> dict:
+    accuracy = (correct_picks / total_picks * 100) if total_picks > 0 else 0
+    return {
+        "total_picks": total_picks,
+        "correct_picks": correct_picks,
+        "accuracy_percentage": accuracy
+    }
+
+
+EMPTY_SCORE = _score(0, 0)
+
+
+def is_locked(db: Session, event_id: int) -> bool:
+    """Whether the event has started and its picks were snapshotted."""
+    return db.query(models.EventLock.id).filter(models.EventLock.event_id == event_id).first() is not None
+
+
+def score_event(db: Session, event_id: int, user_id: Optional[int] = None) -> Dict[int, dict]:
+    """
+    Score picks for an event with one aggregate query joining picks to
+    results on integer keys: the locked snapshot once the event has started,
+    the live picks before. Returns scores keyed by user_id; users without
+    any picks on the card are absent.
+    """
+    picks = models.LockedPick if is_locked(db, event_id) else models.Pick
+    points = (
+        case((models.Result.winner_id == picks.fighter_id, WINNER_POINTS * 1.0), else_=0.0)
+        + case((models.Result.method == picks.method, METHOD_POINTS), else_=0.0)
+    )
+    query = (
+        db.query(picks.user_id, func.count(picks.id), func.coalesce(func.sum(points), 0.0))
+        .outerjoin(models.Result, models.Result.fight_id == picks.fight_id)
+        .group_by(picks.user_id)
+    )
+    if picks is models.LockedPick:
+        query = query.filter(picks.event_id == event_id)
+    else:
+        query = query.join(models.Fight, models.Fight.id == picks.fight_id).filter(models.Fight.event_id == event_id)
+    if user_id is not None:
+        query = query.filter(picks.user_id == user_id)
+
+    return {row_user_id: _score(total, float(correct)) for row_user_id, total, correct in query}
+
+
+def _apply_score(db: Session, row: Optional[models.UserEventScore], user_id: int, event_id: int, score: dict):
+    if row is None:
+        row = models.UserEventScore(user_id=user_id, event_id=event_id)
+        db.add(row)
+    row.total_picks = score["total_picks"]
+    row.correct_picks = score["correct_picks"]
+    row.accuracy_percentage = score["accuracy_percentage"]
+    return row
+
+
+def refresh_user_event_score(db: Session, user_id: int, event_id: int):
+    """
+    Rescore a single user's picks for an event into user_event_scores.
+    Does not commit, so the score lands in the caller's transaction.
+    """
+    db.flush()
+    score = score_event(db, event_id, user_id=user_id).get(user_id, EMPTY_SCORE)
+    row = db.query(models.UserEventScore).filter(
+        models.UserEventScore.user_id == user_id,
+        models.UserEventScore.event_id == event_id
+    ).first()
+    row = _apply_score(db, row, user_id, event_id, score)
+    refresh_standings(db, event_id, user_ids=[user_id])
+    return row
+
+
+def refresh_event_scores(db: Session, event_id: int) -> int:
+    """
+    Rescore every entrant of an event into user_event_scores after a result
+    changes. Does not commit, so the scores land in the caller's transaction.
+    Returns the number of entrants scored.
+    """
+    db.flush()
+    scores = score_event(db, event_id)
+
+    # Once the event has locked, its entrants are the users in the snapshot
+    if is_locked(db, event_id):
+        entrants = db.query(models.LockedPick.user_id).filter(models.LockedPick.event_id == event_id).distinct().all()
+    else:
+        entrants = db.query(models.UserEventPicks.user_id).filter(
+            models.UserEventPicks.event_id == event_id
+        ).all()
+    existing = {
+        row.user_id: row
+        for row in db.query(models.UserEventScore).filter(models.UserEventScore.event_id == event_id)
+    }
+
+    for (user_id,) in entrants:
+        _apply_score(db, existing.pop(user_id, None), user_id, event_id, scores.get(user_id, EMPTY_SCORE))
+
+    # Scores left over belong to picks that no longer exist
+    removed = [row.user_id for row in existing.values()]
+    for row in existing.values():
+        db.delete(row)
+
+    refresh_standings(db, event_id)
+    if removed:
+        # No longer entrants, but their standings still counted the event
+        refresh_standings(db, event_id, user_ids=removed)
+    return len(entrants)
+
+
+def remove_event_scores(db: Session, event_id: int):
+    """
+    Delete an event's scores and recompute the standings they counted
+    toward, before the event itself is deleted. Does not commit.
+    """
+    db.flush()
+    scores = db.query(models.UserEventScore).filter(models.UserEventScore.event_id == event_id)
+    user_ids = [user_id for (user_id,) in scores.with_entities(models.UserEventScore.user_id)]
+    scores.delete()
+    if user_ids:
+        refresh_standings(db, event_id, user_ids=user_ids)
+
+
+def rebuild_scores(db: Session) -> int:
+    """
+    Recompute user_event_scores from UserEventPicks and Result for every event,
+    repairing any drift. Does not commit. Returns the number of rows scored.
+    """
+    event_ids = {event_id for (event_id,) in db.query(models.UserEventPicks.event_id).distinct()}
+    event_ids |= {event_id for (event_id,) in db.query(models.UserEventScore.event_id).distinct()}
+
+    count = sum(refresh_event_scores(db, event_id) for event_id in sorted(event_ids))
+    rebuild_standings(db)
+    return count
+
+
+def read_event_leaderboard(db: Session, event_id: int) -> List[dict]:
+    """Read an event's leaderboard from user_event_scores in rank order."""
+    rows = (
+        db.query(models.UserEventScore, models.User.username)
+        .join(models.User, models.User.id == models.UserEventScore.user_id)
+        .filter(models.UserEventScore.event_id == event_id)
+        .order_by(models.UserEventScore.accuracy_percentage.desc(), models.UserEventScore.id)
+        .all()
+    )
+
+    return [
+        {
+            "rank": i + 1,
+            "user_id": score.user_id,
+            "username": username,
+            "total_picks": score.total_picks,
+            "correct_picks": score.correct_picks,
+            "accuracy_percentage": score.accuracy_percentage
+        }
+        for i, (score, username) in enumerate(rows)
+    ]
+
+
+def _season_bounds(season: int) -> Tuple[date, date]:
+    return date(season, 1, 1), date(season + 1, 1, 1)
+
+
+def _write_standings(db: Session, season: int, user_ids=None):
+    """
+    Replace the standings for one season (or ALL_TIME) with a single
+    aggregate over user_event_scores, optionally limited to some users: a
+    list of ids, or a select of them.
+    """
+    standing = models.UserStanding.__table__
+    totals = func.sum(models.UserEventScore.total_picks)
+    points = func.sum(models.UserEventScore.correct_picks)
+
+    aggregate = (
+        select(
+            models.UserEventScore.user_id,
+            literal(season),
+            func.count(models.UserEventScore.id),
+            totals,
+            points,
+            case((totals > 0, points * 100.0 / totals), else_=0),
+        )
+        .join(models.Event, models.Event.id == models.UserEventScore.event_id)
+        .group_by(models.UserEventScore.user_id)
+    )
+    delete = standing.delete().where(standing.c.season == season)
+
+    if season != ALL_TIME:
+        start, end = _season_bounds(season)
+        aggregate = aggregate.where(models.Event.date >= start, models.Event.date < end)
+    if user_ids is not None:
+        aggregate = aggregate.where(models.UserEventScore.user_id.in_(user_ids))
+        delete = delete.where(standing.c.user_id.in_(user_ids))
+
+    db.execute(delete)
+    db.execute(
+        insert(standing).from_select(
+            ["user_id", "season", "events_entered", "total_picks", "correct_picks", "accuracy_percentage"],
+            aggregate,
+        )
+    )
+
+
+def refresh_standings(db: Session, event_id: int, user_ids: Optional[List[int]] = None):
+    """
+    Recompute the season and all-time standings touched by an event's
+    scores, for the given users or else the event's entrants; no one else's
+    standing can have changed. Does not commit, so the standings land in
+    the caller's transaction.
+    """
+    db.flush()
+    event_date = db.query(models.Event.date).filter(models.Event.id == event_id).scalar()
+    if user_ids is None:
+        user_ids = select(models.UserEventScore.user_id).where(models.UserEventScore.event_id == event_id)
+
+    _write_standings(db, ALL_TIME, user_ids=user_ids)
+    if event_date is not None:
+        _write_standings(db, event_date.year, user_ids=user_ids)
+
+
+def rebuild_standings(db: Session):
+    """Recompute every season's and the all-time standings. Does not commit."""
+    db.flush()
+    db.query(models.UserStanding).delete()
+
+    years = {event_date.year for (event_date,) in db.query(models.Event.date).distinct() if event_date}
+    for season in [ALL_TIME] + sorted(years):
+        _write_standings(db, season)
+
+
+def _ranked_ahead_of(standing: models.UserStanding):
+    """Filter for standings that rank strictly ahead of the given one."""
+    UserStanding = models.UserStanding
+    return or_(
+        UserStanding.correct_picks > standing.correct_picks,
+        and_(
+            UserStanding.correct_picks == standing.correct_picks,
+            or_(
+                UserStanding.accuracy_percentage > standing.accuracy_percentage,
+                and_(
+                    UserStanding.accuracy_percentage == standing.accuracy_percentage,
+                    UserStanding.user_id < standing.user_id,
+                ),
+            ),
+        ),
+    )
+
+
+def _standing_entry(rank: int, standing: models.UserStanding, username: str) -> dict:
+    return {
+        "rank": rank,
+        "user_id": standing.user_id,
+        "username": username,
+        "events_entered": standing.events_entered,
+        "total_picks": standing.total_picks,
+        "correct_picks": standing.correct_picks,
+        "accuracy_percentage": standing.accuracy_percentage
+    }
+
+
+def read_standings(db: Session, season: int, limit: int = 10, offset: int = 0) -> List[dict]:
+    """
+    Read the top of a season's (or ALL_TIME) standings, ranked by points,
+    then accuracy, then user id. Walks the rank index instead of sorting.
+    """
+    rows = (
+        db.query(models.UserStanding, models.User.username)
+        .join(models.User, models.User.id == models.UserStanding.user_id)
+        .filter(models.UserStanding.season == season)
+        .order_by(
+            models.UserStanding.correct_picks.desc(),
+            models.UserStanding.accuracy_percentage.desc(),
+            models.UserStanding.user_id,
+        )
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [_standing_entry(offset + i + 1, standing, username) for i, (standing, username) in enumerate(rows)]
+
+
+def read_user_rank(db: Session, user_id: int, season: int) -> Optional[dict]:
+    """
+    Look up one user's rank in a season's (or ALL_TIME) standings with an
+    indexed count of the users ranked ahead of them.
+    """
+    row = (
+        db.query(models.UserStanding, models.User.username)
+        .join(models.User, models.User.id == models.UserStanding.user_id)
+        .filter(models.UserStanding.season == season, models.UserStanding.user_id == user_id)
+        .first()
+    )
+    if not row:
+        return None
+
+    standing, username = row
+    ahead = db.query(func.count(models.UserStanding.id)).filter(
+        models.UserStanding.season == season,
+        _ranked_ahead_of(standing),
+    ).scalar()
+    total = db.query(func.count(models.UserStanding.id)).filter(models.UserStanding.season == season).scalar()
+
+    entry = _standing_entry(ahead + 1, standing, username)
+    entry["total_ranked"] = total
+    return entry
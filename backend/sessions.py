@@ -0,0 +1,153 @@
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import Session
+
+import models
+
+# Name of the cookie holding the session token
+SESSION_COOKIE = "session"
+
+# How long a session lasts after login
+SESSION_LIFETIME_SECONDS = int(os.environ.get("PUNCHPICKS_SESSION_LIFETIME_SECONDS", 1800))
+
+# How long a looked-up session is trusted before re-reading it, and how many to
+# keep. Logging out evicts the session from its own process's cache only, so
+# other processes keep accepting the token for up to the TTL; keep it short
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("PUNCHPICKS_SESSION_CACHE_TTL_SECONDS", 5))
+SESSION_CACHE_SIZE = int(os.environ.get("PUNCHPICKS_SESSION_CACHE_SIZE", 10000))
+
+
+class SessionUser(NamedTuple):
+    """The authenticated user as recorded on their session."""
+    id: int
+    username: str
+
+
+class SessionCache:
+    """
+    In-process LRU cache of session lookups with a TTL. Entries never
+    outlive the session they came from.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash: str) -> Optional[SessionUser]:
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            user, valid_until = entry
+            if valid_until <= time.monotonic():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return user
+
+    def put(self, token_hash: str, user: SessionUser, expires_at: datetime):
+        session_left = (expires_at - datetime.now()).total_seconds()
+        valid_until = time.monotonic() + min(self.ttl, session_left)
+        with self._lock:
+            self._entries[token_hash] = (user, valid_until)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, token_hash: str):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = SessionCache(SESSION_CACHE_TTL_SECONDS, SESSION_CACHE_SIZE)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_session(db: Session, user: models.User) -> str:
+    """
+    Start a session for the user and return its random token. Run by the
+    group commit writer, so it flushes and the writer commits.
+    """
+    now = datetime.now()
+
+    # Clear out sessions that have run out while we are writing anyway
+    db.query(models.UserSession).filter(models.UserSession.expires_at <= now).delete(synchronize_session=False)
+
+    token = secrets.token_urlsafe(32)
+    db_session = models.UserSession(
+        token_hash=hash_token(token),
+        user_id=user.id,
+        username=user.username,
+        expires_at=now + timedelta(seconds=SESSION_LIFETIME_SECONDS)
+    )
+    db.add(db_session)
+    db.flush()
+
+    cache.put(db_session.token_hash, SessionUser(user.id, user.username), db_session.expires_at)
+    return token
+
+
+def end_session(db: Session, token: str):
+    """
+    Delete a session. Run by the group commit writer; once it has
+    committed, evict the session from this process's cache with
+    forget_session.
+    """
+    token_hash = hash_token(token)
+    db.query(models.UserSession).filter(models.UserSession.token_hash == token_hash).delete(synchronize_session=False)
+
+
+def forget_session(token: str):
+    """
+    Drop an ended session from this process's cache, so it is refused here
+    at once. Call it after the delete commits, so no lookup in between can
+    cache the session again. Other processes stop accepting it once their
+    cached lookup expires, within SESSION_CACHE_TTL_SECONDS.
+    """
+    cache.evict(hash_token(token))
+
+
+def lookup_session(db: Session, token: str) -> Optional[SessionUser]:
+    """Resolve a session token to its user, from the cache when possible."""
+    token_hash = hash_token(token)
+    user = cache.get(token_hash)
+    if user is not None:
+        return user
+
+    db_session = db.query(models.UserSession).filter(models.UserSession.token_hash == token_hash).first()
+    if not db_session or db_session.expires_at <= datetime.now():
+        return None
+
+    user = SessionUser(db_session.user_id, db_session.username)
+    cache.put(token_hash, user, db_session.expires_at)
+    return user
+
+
+# Helper function to get current user from session
+def get_current_user(request: Request, db: Session) -> SessionUser:
+    token = request.cookies.get(SESSION_COOKIE)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user = lookup_session(db, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid session")
+
+    return user
@@ -0,0 +1,125 @@
+import os
+import tempfile
+
+# Settings are read at import time, so keep the app's own database files out
+# of the working tree before anything imports it
+os.environ.setdefault("PUNCHPICKS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="punchpicks-test-"), "punch_picks.db"))
+
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import migrations
+import models
+from routers.import_data import EventImport, import_events
+
+METHODS = ["KO", "SUB", "PTS"]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    migrations.migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_statements(engine):
+    """Context manager collecting the SQL statements the engine runs inside it."""
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    return counting
+
+
+def card(prefix, fights=3, event_date=date(2030, 1, 1)):
+    """An import payload for a card whose fight and fighter ids start with prefix."""
+    return EventImport(
+        title=f"{prefix} Night",
+        date=event_date,
+        location="Test Arena",
+        fights=[
+            {
+                "fight_id": f"{prefix}-fight{i}",
+                "weight_class": "Lightweight",
+                "is_main_event": i == 0,
+                "order": i + 1,
+                "fighter1": {"fighter_id": f"{prefix}-f{i}a", "name": f"Fighter {i}A"},
+                "fighter2": {"fighter_id": f"{prefix}-f{i}b", "name": f"Fighter {i}B"},
+            }
+            for i in range(fights)
+        ],
+    )
+
+
+@pytest.fixture
+def import_card(db):
+    """Import a card and return its event id. Nothing is committed."""
+    def import_(prefix, fights=3, event_date=date(2030, 1, 1)):
+        return import_events(db, [card(prefix, fights, event_date)])[0]["event_id"]
+    return import_
+
+
+@pytest.fixture
+def seed_event(db, import_card):
+    """
+    Import a card, register the entrants and enter a full card of picks for
+    each, alternating fighters and methods. Returns (event_id, user_ids).
+    Nothing is scored or committed.
+    """
+    def seed(prefix, entrants, fights=3, event_date=date(2030, 1, 1)):
+        event_id = import_card(prefix, fights, event_date)
+        fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).order_by(models.Fight.order).all()
+
+        db.execute(insert(models.User), [
+            {"username": f"{prefix}-user{i}", "password_hash": "x"} for i in range(entrants)
+        ])
+        user_ids = [
+            user_id for (user_id,) in
+            db.query(models.User.id).filter(models.User.username.like(f"{prefix}-user%")).order_by(models.User.id)
+        ]
+        db.execute(insert(models.UserEventPicks), [{"user_id": user_id, "event_id": event_id} for user_id in user_ids])
+        db.execute(insert(models.Pick), [
+            {
+                "user_id": user_id,
+                "fight_id": fight.id,
+                "fighter_id": fight.fighter1_id if (user_id + i) % 2 else fight.fighter2_id,
+                "method": METHODS[(user_id + i) % len(METHODS)],
+            }
+            for user_id in user_ids
+            for i, fight in enumerate(fights)
+        ])
+        return event_id, user_ids
+    return seed
+
+
+@pytest.fixture
+def post_results(db):
+    """Record fighter 1 winning every fight on an event's card by KO. Nothing is scored."""
+    def post(event_id):
+        fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).all()
+        db.execute(insert(models.Result), [
+            {"fight_id": fight.id, "winner_id": fight.fighter1_id, "method": "KO"} for fight in fights
+        ])
+    return post
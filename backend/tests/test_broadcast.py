@@ -0,0 +1,76 @@
+import broadcast
+import models
+import scoring
+from routers.results import ResultCreate, save_result
+
+
+def entry(user_id, rank, correct_picks):
+    return {
+        "rank": rank,
+        "user_id": user_id,
+        "username": f"u{user_id}",
+        "total_picks": 3,
+        "correct_picks": correct_picks,
+        "accuracy_percentage": correct_picks / 3 * 100,
+    }
+
+
+def apply_changes(leaderboard, changes):
+    """What the leaderboard page's applyLeaderboardChanges does with a pushed change."""
+    replaced = {changed["user_id"] for changed in changes["changed"]} | set(changes["removed"])
+    scores = {score["user_id"]: score for score in changes["scores"]}
+    kept = [dict(entry, **scores.get(entry["user_id"], {})) for entry in leaderboard if entry["user_id"] not in replaced]
+    moved = [{key: value for key, value in changed.items() if key != "previous_rank"} for changed in changes["changed"]]
+    return sorted(kept + moved, key=lambda entry: entry["rank"])
+
+
+def test_rank_changes_sends_full_entries_only_when_the_rank_moved():
+    before = [entry(1, 1, 2.0), entry(2, 2, 1.0), entry(3, 3, 0.5), entry(4, 4, 0.0)]
+    after = [entry(2, 1, 3.0), entry(1, 2, 2.0), entry(3, 3, 1.5), entry(5, 4, 0.5)]
+
+    changes = broadcast.rank_changes(before, after)
+
+    assert changes["changed"] == [
+        dict(entry(2, 1, 3.0), previous_rank=2),
+        dict(entry(1, 2, 2.0), previous_rank=1),
+        dict(entry(5, 4, 0.5), previous_rank=None),
+    ]
+    # User 3 scored but kept third place, so only the new score is sent
+    assert changes["scores"] == [
+        {"user_id": 3, "total_picks": 3, "correct_picks": 1.5, "accuracy_percentage": 50.0},
+    ]
+    assert changes["removed"] == [4]
+    assert apply_changes(before, changes) == after
+
+
+def test_rank_changes_is_empty_when_nothing_moves():
+    before = [entry(1, 1, 2.0), entry(2, 2, 1.0)]
+
+    assert broadcast.rank_changes(before, list(before)) == {"changed": [], "scores": [], "removed": []}
+
+
+def test_result_that_keeps_the_ranks_still_updates_the_scores(db, seed_event):
+    event_id, user_ids = seed_event("live", 2)
+    scoring.refresh_event_scores(db, event_id)
+    db.commit()
+    before = scoring.read_event_leaderboard(db, event_id)
+
+    # The leader's pick on the first fight wins, so everyone keeps their rank
+    leader_pick = db.query(models.Pick).join(models.Fight).filter(
+        models.Pick.user_id == before[0]["user_id"], models.Fight.fight_id == "live-fight0"
+    ).one()
+    queue = broadcast.feed.subscribe(event_id)
+    try:
+        _, _, changes = save_result(db, ResultCreate(
+            fight_id=leader_pick.fight_id, winner_id=leader_pick.fighter_id, method=leader_pick.method
+        ))
+        db.commit()
+    finally:
+        broadcast.feed.unsubscribe(event_id, queue)
+
+    after = scoring.read_event_leaderboard(db, event_id)
+    leaderboard = changes[event_id]
+    assert [entry["user_id"] for entry in after] == [entry["user_id"] for entry in before]
+    assert leaderboard["changed"] == []
+    assert leaderboard["scores"]
+    assert apply_changes(before, leaderboard) == after
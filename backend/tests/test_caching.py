@@ -0,0 +1,83 @@
+import asyncio
+
+import caching
+import models
+
+
+def versions(db):
+    return {row.scope: (row.version, row.modified) for row in db.query(models.DataVersion)}
+
+
+def test_bump_commits_with_the_write(db, import_card):
+    import_card("first")
+    db.commit()
+    first = versions(db)
+    assert set(first) == {caching.EVENTS, caching.FIGHTERS, caching.FIGHTS}
+    assert first[caching.EVENTS][0] == 1
+
+    caching.bump(db, caching.EVENTS, caching.SCORES)
+    db.commit()
+    second = versions(db)
+    assert second[caching.EVENTS][0] == 2
+    assert second[caching.SCORES][0] == 1
+    assert second[caching.FIGHTS] == first[caching.FIGHTS]
+    # Last-Modified moves on even when two writes land in the same second
+    assert second[caching.EVENTS][1] > first[caching.EVENTS][1]
+
+
+def test_rolled_back_write_keeps_the_versions(db, import_card):
+    import_card("first")
+    db.commit()
+    before = versions(db)
+
+    import_card("second")
+    db.rollback()
+    assert versions(db) == before
+
+
+def test_validators_change_with_any_scope(db):
+    etag, last_modified = caching.validators([(1, 100), (3, 200)])
+    assert etag == 'W/"1-3"'
+    assert last_modified == 200
+    assert caching.validators([(1, 100), (4, 201)])[0] != etag
+    assert caching.validators([(1, 100), (3, 200)], "session")[0] != etag
+
+
+def test_versions_are_reused_until_this_process_commits_a_bump(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine, update
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import database
+    import migrations
+
+    path = tmp_path / "versions.db"
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.migrate(engine)
+    monkeypatch.setattr(database, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{path}"))
+    monkeypatch.setattr(caching, "VERSION_CACHE_SECONDS", 60)
+    monkeypatch.setattr(caching, "_versions_read_at", float("-inf"))
+    session = sessionmaker(bind=engine)()
+
+    def read():
+        return asyncio.run(caching.read_versions([caching.EVENTS]))[0][0]
+
+    caching.bump(session, caching.EVENTS)
+    session.commit()
+    assert read() == 1
+
+    # Another process's write is not seen until the cached versions expire
+    with engine.begin() as connection:
+        connection.execute(update(models.DataVersion).values(version=models.DataVersion.version + 1))
+    assert read() == 1
+    monkeypatch.setattr(caching, "VERSION_CACHE_SECONDS", 0)
+    assert read() == 2
+    monkeypatch.setattr(caching, "VERSION_CACHE_SECONDS", 60)
+
+    # This process's own writes are seen at once
+    caching.bump(session, caching.EVENTS)
+    session.commit()
+    assert read() == 3
+
+    session.close()
+    engine.dispose()
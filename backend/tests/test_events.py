@@ -0,0 +1,54 @@
+from datetime import date
+
+import consensus
+import models
+import scoring
+from routers.events import remove_event
+
+
+def test_deleted_event_leaves_nothing_for_a_reimported_event(db, seed_event, post_results, import_card):
+    event_id, user_ids = seed_event("old", 3, event_date=date(2030, 5, 1))
+    post_results(event_id)
+    consensus.rebuild_pick_counts(db)
+    scoring.refresh_event_scores(db, event_id)
+    db.commit()
+    assert scoring.read_event_leaderboard(db, event_id)
+    assert scoring.read_standings(db, 2030)
+
+    remove_event(db, event_id)
+    db.commit()
+
+    assert db.get(models.Event, event_id) is None
+    assert scoring.read_event_leaderboard(db, event_id) == []
+    assert scoring.read_standings(db, scoring.ALL_TIME) == []
+    assert scoring.read_standings(db, 2030) == []
+    assert consensus.find_drift(db) == []
+
+    # SQLite hands the deleted event's id to the next one
+    new_event_id = import_card("new", event_date=date(2030, 6, 1))
+    db.commit()
+    assert new_event_id == event_id
+
+    assert scoring.read_event_leaderboard(db, new_event_id) == []
+    assert scoring.read_standings(db, 2030) == []
+    assert db.query(models.UserEventPicks).filter(models.UserEventPicks.event_id == new_event_id).count() == 0
+    assert all(fight["total_picks"] == 0 for fight in consensus.read_card_consensus(db, new_event_id))
+
+    scoring.refresh_event_scores(db, new_event_id)
+    assert scoring.read_event_leaderboard(db, new_event_id) == []
+
+
+def test_deleting_one_event_keeps_the_others_standings(db, seed_event, post_results):
+    kept_event_id, user_ids = seed_event("kept", 2, event_date=date(2030, 1, 1))
+    deleted_event_id, _ = seed_event("deleted", 2, event_date=date(2030, 2, 1))
+    for event_id in (kept_event_id, deleted_event_id):
+        post_results(event_id)
+        scoring.refresh_event_scores(db, event_id)
+    db.commit()
+
+    remove_event(db, deleted_event_id)
+    db.commit()
+
+    standings = scoring.read_standings(db, 2030)
+    assert sorted(entry["user_id"] for entry in standings) == user_ids
+    assert all(entry["events_entered"] == 1 for entry in standings)
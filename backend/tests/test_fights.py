@@ -0,0 +1,72 @@
+import consensus
+import models
+import scoring
+from routers.fights import FightUpdate, remove_fight, save_fight_update
+
+
+def scored_event(db, seed_event, post_results, prefix, entrants=4, fights=4):
+    event_id, user_ids = seed_event(prefix, entrants, fights=fights)
+    post_results(event_id)
+    consensus.rebuild_pick_counts(db)
+    scoring.refresh_event_scores(db, event_id)
+    db.commit()
+    return event_id, user_ids
+
+
+def accuracies(db, event_id):
+    return {entry["user_id"]: entry["accuracy_percentage"] for entry in scoring.read_event_leaderboard(db, event_id)}
+
+
+def rescored(db, event_id):
+    """The entrants' accuracies as scoring the event from scratch gives them."""
+    scores = scoring.score_event(db, event_id)
+    return {
+        user_id: scores.get(user_id, scoring.EMPTY_SCORE)["accuracy_percentage"]
+        for user_id in accuracies(db, event_id)
+    }
+
+
+def test_deleting_a_scored_fight_rescores_its_event(db, seed_event, post_results):
+    event_id, user_ids = scored_event(db, seed_event, post_results, "del")
+    before = accuracies(db, event_id)
+
+    remove_fight(db, "del-fight0")
+    db.commit()
+
+    assert accuracies(db, event_id) != before
+    assert accuracies(db, event_id) == rescored(db, event_id)
+    assert all(entry["total_picks"] == 3 for entry in scoring.read_event_leaderboard(db, event_id))
+    assert consensus.find_drift(db) == []
+
+
+def test_moving_a_fight_rescores_both_events(db, seed_event, post_results):
+    from_event_id, _ = scored_event(db, seed_event, post_results, "from")
+    to_event_id, _ = scored_event(db, seed_event, post_results, "to")
+    fight = db.query(models.Fight).filter(models.Fight.fight_id == "from-fight0").one()
+
+    save_fight_update(db, "from-fight0", FightUpdate(event_id=to_event_id))
+    db.commit()
+
+    for event_id in (from_event_id, to_event_id):
+        assert accuracies(db, event_id) == rescored(db, event_id)
+    assert all(entry["total_picks"] == 3 for entry in scoring.read_event_leaderboard(db, from_event_id))
+    assert db.get(models.Fight, fight.id).event_id == to_event_id
+
+
+def test_replacing_a_fighter_voids_their_picks(db, seed_event, post_results):
+    event_id, _ = scored_event(db, seed_event, post_results, "swap")
+    fight = db.query(models.Fight).filter(models.Fight.fight_id == "swap-fight0").one()
+    replacement = models.Fighter(fighter_id="swap-replacement", name="Replacement")
+    db.add(replacement)
+    db.flush()
+    picked_fighter2 = db.query(models.Pick).filter(
+        models.Pick.fight_id == fight.id, models.Pick.fighter_id == fight.fighter2_id
+    ).count()
+    assert picked_fighter2
+
+    save_fight_update(db, "swap-fight0", FightUpdate(fighter2_id=replacement.id))
+    db.commit()
+
+    assert db.query(models.Pick).filter(models.Pick.fight_id == fight.id).count() == 4 - picked_fighter2
+    assert sum(entry["total_picks"] for entry in scoring.read_event_leaderboard(db, event_id)) == 16 - picked_fighter2
+    assert consensus.find_drift(db) == []
@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+import migrations
+import models
+
+
+def test_hot_queries_use_their_indexes(engine):
+    with engine.connect() as connection:
+        assert migrations.check_query_plans(connection) == []
+
+
+def test_migrated_schema_matches_models(engine):
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        assert inspector.has_table(table.name), table.name
+        assert {column.name for column in table.columns} <= {column["name"] for column in inspector.get_columns(table.name)}
+        assert {index.name for index in table.indexes} <= {index["name"] for index in inspector.get_indexes(table.name)}
+
+
+def baseline_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        migrations.MIGRATIONS[0].apply(connection)
+    return engine
+
+
+def test_baseline_is_the_schema_from_before_migrations():
+    inspector = inspect(baseline_engine())
+
+    assert set(inspector.get_table_names()) == set(migrations.BASELINE_TABLES)
+    # Only the indexes create_all made for index=True and unique=True columns
+    assert {index["name"] for index in inspector.get_indexes("picks")} == {"ix_picks_id"}
+    assert {index["name"] for index in inspector.get_indexes("events")} == {"ix_events_id", "ix_events_title"}
+
+
+def test_baseline_database_migrates_to_the_models():
+    engine = baseline_engine()
+
+    applied = migrations.migrate(engine)
+
+    assert [migration.version for migration in applied] == [migration.version for migration in migrations.MIGRATIONS]
+    test_migrated_schema_matches_models(engine)
+    with engine.connect() as connection:
+        assert migrations.check_query_plans(connection) == []
+    migrations.verify(engine)
+
+
+def test_database_created_before_migrations_migrates_cleanly():
+    # Such a database already has any table or index create_all gave it then
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+
+    migrations.migrate(engine)
+
+    test_migrated_schema_matches_models(engine)
+    migrations.verify(engine)
@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException, Response
+
+import models
+from pagination import NEXT_CURSOR_HEADER, paginate
+
+EVENT_ORDER = [models.Event.date, models.Event.id]
+
+
+def all_pages(db, limit):
+    ids, cursor = [], None
+    while True:
+        response = Response()
+        page = paginate(db.query(models.Event), EVENT_ORDER, response, cursor=cursor, limit=limit)
+        ids += [event.id for event in page]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_cursor_pages_include_events_without_a_date_once(db, limit):
+    dates = [date(2030, 3, 1), None, date(2030, 1, 1), None, date(2030, 1, 1), date(2030, 2, 1), None]
+    events = [models.Event(title=f"Event {i}", date=event_date, location="Arena") for i, event_date in enumerate(dates)]
+    db.add_all(events)
+    db.flush()
+
+    undated = [event.id for event in events if event.date is None]
+    dated = [event.id for event in sorted((event for event in events if event.date), key=lambda event: (event.date, event.id))]
+    assert all_pages(db, limit) == undated + dated
+
+
+@pytest.mark.parametrize("values", [
+    [123, 1], [{"date": "2030-01-01"}, 1], ["not a date", 1], [None], "2030-01-01",
+    ["2030-01-01", "x"], ["2030-01-01", {"a": 1}], ["2030-01-01", "7"], ["2030-01-01", 1.5], [None, [1]],
+])
+def test_malformed_cursor_is_a_bad_request(db, values):
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+    with pytest.raises(HTTPException) as error:
+        paginate(db.query(models.Event), EVENT_ORDER, Response(), cursor=cursor)
+    assert error.value.status_code == 400
+
+
+def test_cursor_with_a_float_for_an_integer_id_is_coerced(db):
+    events = [models.Event(title=f"Event {i}", date=date(2030, 1, 1), location="Arena") for i in range(3)]
+    db.add_all(events)
+    db.flush()
+
+    cursor = base64.urlsafe_b64encode(json.dumps(["2030-01-01", float(events[0].id)]).encode()).decode().rstrip("=")
+    page = paginate(db.query(models.Event), EVENT_ORDER, Response(), cursor=cursor)
+    assert [event.id for event in page] == [event.id for event in events[1:]]
@@ -0,0 +1,20 @@
+import models
+from routers.user_picks import read_event_picks, write_event_picks
+
+
+def test_picks_read_back_in_card_order_after_resubmission(db, import_card):
+    event_id = import_card("order", fights=3)
+    fights = db.query(models.Fight).filter(models.Fight.event_id == event_id).order_by(models.Fight.order).all()
+    user = models.User(username="order-user", password_hash="x")
+    db.add(user)
+    db.flush()
+
+    def rows(card):
+        return [{"fight_id": fight.id, "fighter_id": fight.fighter1_id, "method": "KO"} for fight in card]
+
+    # Submitted out of card order, then resubmitted with a fight dropped and re-added
+    write_event_picks(db, user.id, event_id, rows([fights[2], fights[0]]))
+    write_event_picks(db, user.id, event_id, rows([fights[1], fights[2]]))
+    write_event_picks(db, user.id, event_id, rows([fights[1], fights[0], fights[2]]))
+
+    assert [pick["fight_id"] for pick in read_event_picks(db, user.id, event_id)] == [fight.fight_id for fight in fights]
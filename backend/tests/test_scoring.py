@@ -0,0 +1,81 @@
+import models
+import scoring
+
+
+def test_event_leaderboard_query_count_does_not_grow_with_entrants(db, seed_event, post_results, count_statements):
+    counts = {}
+    for entrants in (1, 40):
+        event_id, _ = seed_event(f"board{entrants}", entrants)
+        post_results(event_id)
+        scoring.refresh_event_scores(db, event_id)
+        db.flush()
+
+        with count_statements() as statements:
+            leaderboard = scoring.read_event_leaderboard(db, event_id)
+        assert len(leaderboard) == entrants
+        counts[entrants] = len(statements)
+
+    assert counts[1] == counts[40]
+
+
+def test_result_rescore_query_count_does_not_grow_with_entrants(db, seed_event, post_results, count_statements):
+    counts = {}
+    for entrants in (1, 40):
+        # Entrants are scored as they submit, before any result is in
+        event_id, _ = seed_event(f"rescore{entrants}", entrants)
+        scoring.refresh_event_scores(db, event_id)
+        db.flush()
+
+        post_results(event_id)
+        with count_statements() as statements:
+            assert scoring.refresh_event_scores(db, event_id) == entrants
+            db.flush()
+        counts[entrants] = len(statements)
+
+    assert counts[1] == counts[40]
+
+
+def standings_rows(db):
+    return {
+        (standing.user_id, standing.season): (standing.id, standing.events_entered, standing.correct_picks)
+        for standing in db.query(models.UserStanding)
+    }
+
+
+def test_rescoring_an_event_only_rewrites_its_entrants_standings(db, seed_event, post_results):
+    event_id, entrants = seed_event("rescored", 3)
+    other_event_id, others = seed_event("other", 3)
+    for seeded_event_id in (event_id, other_event_id):
+        scoring.refresh_event_scores(db, seeded_event_id)
+    db.flush()
+    before = standings_rows(db)
+
+    post_results(event_id)
+    scoring.refresh_event_scores(db, event_id)
+    db.flush()
+    after = standings_rows(db)
+
+    # Other users' rows are left in place rather than deleted and inserted again
+    for user_id in others:
+        assert after[(user_id, scoring.ALL_TIME)] == before[(user_id, scoring.ALL_TIME)]
+    assert all(after[(user_id, scoring.ALL_TIME)][2] > 0 for user_id in entrants)
+
+    # And the result matches recomputing everyone's standings from scratch
+    scoring.rebuild_standings(db)
+    db.flush()
+    assert {key: value[1:] for key, value in after.items()} == {key: value[1:] for key, value in standings_rows(db).items()}
+
+
+def test_standings_drop_an_event_for_users_whose_picks_are_gone(db, seed_event, post_results):
+    event_id, entrants = seed_event("gone", 2)
+    post_results(event_id)
+    scoring.refresh_event_scores(db, event_id)
+    db.flush()
+    assert (entrants[0], scoring.ALL_TIME) in standings_rows(db)
+
+    db.query(models.UserEventPicks).filter(models.UserEventPicks.user_id == entrants[0]).delete()
+    scoring.refresh_event_scores(db, event_id)
+    db.flush()
+
+    assert (entrants[0], scoring.ALL_TIME) not in standings_rows(db)
+    assert (entrants[1], scoring.ALL_TIME) in standings_rows(db)
@@ -0,0 +1,56 @@
+import time
+
+import models
+import sessions
+
+
+def test_logout_elsewhere_is_seen_once_the_cached_lookup_expires(db, monkeypatch):
+    monkeypatch.setattr(sessions, "cache", sessions.SessionCache(0.2, 100))
+    user = models.User(username="sessions-user", password_hash="x")
+    db.add(user)
+    db.commit()
+    token = sessions.create_session(db, user)
+    db.commit()
+
+    # Another process ends the session: the row goes, but this cache still has it
+    db.query(models.UserSession).delete()
+    db.commit()
+    assert sessions.lookup_session(db, token) == sessions.SessionUser(user.id, user.username)
+
+    time.sleep(0.25)
+    assert sessions.lookup_session(db, token) is None
+
+
+def test_logout_in_this_process_is_seen_at_once(db, monkeypatch):
+    monkeypatch.setattr(sessions, "cache", sessions.SessionCache(60, 100))
+    user = models.User(username="sessions-user", password_hash="x")
+    db.add(user)
+    db.commit()
+    token = sessions.create_session(db, user)
+    db.commit()
+    assert sessions.lookup_session(db, token) is not None
+
+    sessions.end_session(db, token)
+    db.commit()
+    sessions.forget_session(token)
+    assert sessions.lookup_session(db, token) is None
+
+
+
+def test_login_saves_an_upgraded_hash_with_its_session(db):
+    from routers.auth import save_login
+
+    user = models.User(username="sessions-user", password_hash="old")
+    db.add(user)
+    db.commit()
+
+    save_login(db, user.id, "new")
+    db.rollback()
+    assert db.get(models.User, user.id).password_hash == "old"
+    assert db.query(models.UserSession).count() == 0
+
+    token = save_login(db, user.id, "new")
+    db.commit()
+    assert db.get(models.User, user.id).password_hash == "new"
+    sessions.cache.clear()
+    assert sessions.lookup_session(db, token) == sessions.SessionUser(user.id, user.username)
@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import functools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy.orm import sessionmaker
+
+from database import POOL_SETTINGS, SQLALCHEMY_DATABASE_URL, apply_sqlite_transactions, create_database_engine
+
+# Most queued writes committed in one transaction, and how long the writer
+# waits for more to arrive after the first before committing
+WRITE_BATCH_SIZE = int(os.environ.get("PUNCHPICKS_WRITE_BATCH_SIZE", 64))
+WRITE_BATCH_WAIT_MS = float(os.environ.get("PUNCHPICKS_WRITE_BATCH_WAIT_MS", 2))
+
+# The writer's own connection to the primary. On SQLite it takes the write
+# lock when a batch begins, so a batch never fails to upgrade a read lock
+# halfway through
+writer_engine = create_database_engine(SQLALCHEMY_DATABASE_URL, dict(POOL_SETTINGS, pool_size=1, max_overflow=0))
+if writer_engine.dialect.name == "sqlite":
+    apply_sqlite_transactions(writer_engine, "BEGIN IMMEDIATE")
+
+WriterSessionLocal = sessionmaker(bind=writer_engine, autoflush=False, expire_on_commit=False)
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread that runs queued write operations in shared
+    transactions. Each operation is a callable taking a Session first; it
+    runs in its own SAVEPOINT, so an operation that raises (an
+    HTTPException from validation, say) is rolled back and re-raised to its
+    own caller without affecting the rest of the batch. Operations must not
+    commit; the writer commits once per batch. Each runs in its caller's
+    context, so per-request state such as metrics follows it.
+    """
+
+    def __init__(self, session_factory, max_batch_size: int, max_wait_seconds: float):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, operation, *args) -> Future:
+        """Queue an operation and return a future for its result."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_forever, name="group-commit-writer", daemon=True)
+                self._thread.start()
+
+        future = Future()
+        context = contextvars.copy_context()
+        self._queue.put((future, functools.partial(context.run, operation), args))
+        return future
+
+    async def run(self, operation, *args):
+        """Queue an operation and wait for it to be committed, returning its result."""
+        return await asyncio.wrap_future(self.submit(operation, *args))
+
+    def close(self):
+        """Commit everything already queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while batch[-1] is not _STOP and len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_forever(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            # Callers that gave up (e.g. a disconnected client) are dropped
+            batch = [item for item in batch if item is not _STOP and item[0].set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        db = self.session_factory()
+        try:
+            try:
+                outcomes = [self._apply(db, operation, args) for _, operation, args in batch]
+                db.commit()
+            except Exception:
+                # The shared commit failed, so give each operation its own transaction
+                db.rollback()
+                outcomes = []
+                for _, operation, args in batch:
+                    outcome = self._apply(db, operation, args)
+                    try:
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        outcome = (None, e)
+                    outcomes.append(outcome)
+        except BaseException as e:
+            outcomes = [(None, e)] * len(batch)
+        finally:
+            db.close()
+
+        for (future, _, _), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _apply(self, db, operation, args):
+        savepoint = db.begin_nested()
+        try:
+            result = operation(db, *args)
+            db.flush()
+            savepoint.commit()
+            return result, None
+        except Exception as e:
+            savepoint.rollback()
+            return None, e
+
+
+writer = GroupCommitWriter(WriterSessionLocal, WRITE_BATCH_SIZE, WRITE_BATCH_WAIT_MS / 1000)
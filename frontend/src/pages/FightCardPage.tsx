@@ -2,17 +2,19 @@
 import React, { useState, useEffect } from "react";
 import { Link, useLocation, useNavigate } from "react-router-dom";
 import { FightCard, Fight } from "../types/Fight";
-import { Pick } from "../types/Picks";
+import { Pick, FightConsensus } from "../types/Picks";
 import { PicksApiService } from "../services/PicksApiService";
 import { FightsApiService } from "../services/FightsApiService";
 import { TimeService } from "../services/TimeService";
 import { useAuth } from "../context/AuthContext";
-import { EventsApiService } from "../services/EventsApiService";
 import { Event } from "../types/Events";
 
 const FightCardPage: React.FC = () => {
   // State to track user's picks
   const [picks, setPicks] = useState<Record<string, Pick>>({});
+  const [consensus, setConsensus] = useState<Record<string, FightConsensus>>(
+    {}
+  );
   const [mainCard, setMainCard] = useState<FightCard | null>(null);
   const [prelimCard, setPrelimCard] = useState<FightCard | null>(null);
   const [hasExistingPicks, setHasExistingPicks] = useState(false);
@@ -57,43 +59,35 @@ const FightCardPage: React.FC = () => {
       try {
         setIsLoading(true);
 
-        // Fetch event details
-        const eventData = await EventsApiService.getEvent(eventId);
+        // Fetch the event, its fights and the user's picks in one request
+        const cardData = await FightsApiService.getEventCard(eventId);
         if (!isMounted) return;
-        setEvent(eventData);
+        setEvent(cardData.event);
 
         // Check event time and set pick submission status
-        const canSubmit = TimeService.canSubmitPicks(eventData);
+        const canSubmit = TimeService.canSubmitPicks(cardData.event);
         setCanSubmitPicks(canSubmit);
 
         // Update time remaining
-        const remaining = TimeService.getTimeUntilPicksLock(eventData);
+        const remaining = TimeService.getTimeUntilPicksLock(cardData.event);
         setTimeRemaining(remaining);
 
-        // Fetch fights for this event
-        const mainCardData = await FightsApiService.getEventFights(eventId);
-        if (!isMounted) return;
-        setMainCard(mainCardData);
-
-        // Fetch prelim fights if available
-        try {
-          const prelimCardData = await FightsApiService.getEventPrelimFights(
-            eventId
-          );
-          if (prelimCardData && isMounted) {
-            setPrelimCard(prelimCardData);
-          }
-        } catch (err) {
-          console.log("No prelim card available");
+        setMainCard(cardData.mainCard);
+        if (cardData.prelimCard) {
+          setPrelimCard(cardData.prelimCard);
         }
 
-        // Fetch user's picks if any
-        const userPicks = await PicksApiService.getUserPicks(eventId);
-        if (userPicks && isMounted) {
-          setPicks(userPicks.picks);
+        // Restore user's picks if any
+        if (cardData.picks) {
+          setPicks(cardData.picks.picks);
           setHasExistingPicks(true);
         }
 
+        // Load how everyone else picked without holding up the card
+        PicksApiService.getEventConsensus(eventId).then((data) => {
+          if (isMounted) setConsensus(data);
+        });
+
         if (isMounted) {
           setError(null);
           setIsLoading(false);
@@ -194,6 +188,7 @@ const FightCardPage: React.FC = () => {
       setIsSubmitting(true);
       await PicksApiService.submitPicks(eventId, picks);
       setHasExistingPicks(true);
+      setConsensus(await PicksApiService.getEventConsensus(eventId));
       setError(null);
       setSubmitMessage({
         type: "success",
@@ -267,6 +262,29 @@ const FightCardPage: React.FC = () => {
     );
   }
 
+  // Render how everyone picked a fight, e.g. "62% picked Volkanovski, 40% by KO"
+  const renderConsensus = (fight: Fight) => {
+    const fightConsensus = consensus[fight.id];
+    if (!fightConsensus || fightConsensus.totalPicks === 0) return null;
+
+    const [favorite] = [fight.fighter1, fight.fighter2].sort(
+      (a, b) =>
+        (fightConsensus.fighters[b.id] || 0) -
+        (fightConsensus.fighters[a.id] || 0)
+    );
+    const [method, methodShare] = Object.entries(fightConsensus.methods).sort(
+      (a, b) => b[1] - a[1]
+    )[0] || ["", 0];
+
+    return (
+      <p className="text-sm text-gray-500 text-center mb-2">
+        {Math.round(fightConsensus.fighters[favorite.id] || 0)}% picked{" "}
+        {favorite.name}
+        {method && `, ${Math.round(methodShare)}% by ${method}`}
+      </p>
+    );
+  };
+
   // Render fight card section
   const renderFightCard = (card: FightCard) => (
     <div>
@@ -314,6 +332,8 @@ const FightCardPage: React.FC = () => {
               </button>
             </div>
 
+            {renderConsensus(fight)}
+
             <div className="mt-6">
               <p className="text-sm text-gray-500 mb-2 text-center">
                 {!canSubmitPicks
@@ -4,6 +4,7 @@ import Leaderboard from "../components/Leaderboard";
 import {
   LeaderboardService,
   LeaderboardEntry,
+  applyLeaderboardChanges,
 } from "../services/LeaderboardService";
 
 const LeaderboardPage: React.FC = () => {
@@ -33,7 +34,18 @@ const LeaderboardPage: React.FC = () => {
       }
     };
 
-    fetchLeaderboard();
+    if (!eventId) {
+      fetchLeaderboard();
+      return;
+    }
+
+    // Load the board whenever the live stream (re)connects, then apply the
+    // rank and score changes it pushes as results come in
+    return LeaderboardService.subscribeToEvent(eventId, {
+      onSubscribed: fetchLeaderboard,
+      onLeaderboard: (changes) =>
+        setLeaderboard((current) => applyLeaderboardChanges(current, changes)),
+    });
   }, [eventId]);
 
   if (isLoading) {
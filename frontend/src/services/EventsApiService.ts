@@ -79,37 +79,42 @@ export class EventsApiService {
 
       const event = await response.json();
 
-      // Create a date object for the event date
-      const eventDate = new Date(event.date);
-      const now = new Date();
-
-      // ALWAYS set to a future time to ensure picks aren't locked
-      // For today's events, set to 11 PM
-      const startTime = new Date();
-      startTime.setHours(12, 15, 0, 0); // Set to 11 PM today
-
-      // Set end time to 8 hours after start time
-      const endTime = new Date(startTime);
-      endTime.setHours(endTime.getHours() + 8);
-
-      return {
-        id: event.id.toString(),
-        number: event.title.includes("UFC")
-          ? parseInt(event.title.replace("UFC", "").trim())
-          : null,
-        date: eventDate.toLocaleDateString(),
-        location: event.location,
-        startTime: startTime.toISOString(),
-        endTime: endTime.toISOString(),
-        title: event.title,
-        mainEvent: {
-          fighter1: "TBD",
-          fighter2: "TBD",
-        },
-      };
+      return EventsApiService.mapEvent(event);
     } catch (error) {
       console.error("Error fetching event:", error);
       throw error;
     }
   }
+
+  // Map a backend event to our Event structure
+  static mapEvent(event: any): Event {
+    // Create a date object for the event date
+    const eventDate = new Date(event.date);
+    const now = new Date();
+
+    // ALWAYS set to a future time to ensure picks aren't locked
+    // For today's events, set to 11 PM
+    const startTime = new Date();
+    startTime.setHours(12, 15, 0, 0); // Set to 11 PM today
+
+    // Set end time to 8 hours after start time
+    const endTime = new Date(startTime);
+    endTime.setHours(endTime.getHours() + 8);
+
+    return {
+      id: event.id.toString(),
+      number: event.title.includes("UFC")
+        ? parseInt(event.title.replace("UFC", "").trim())
+        : null,
+      date: eventDate.toLocaleDateString(),
+      location: event.location,
+      startTime: startTime.toISOString(),
+      endTime: endTime.toISOString(),
+      title: event.title,
+      mainEvent: {
+        fighter1: "TBD",
+        fighter2: "TBD",
+      },
+    };
+  }
 }
@@ -1,9 +1,82 @@
 // src/services/FightsApiService.ts
 import { FightCard, Fight, Fighter } from "../types/Fight";
+import { Event } from "../types/Events";
+import { UserEventPicks } from "../types/Picks";
+import { EventsApiService } from "./EventsApiService";
+import { PicksApiService } from "./PicksApiService";
 
 const API_URL = "http://localhost:8000/api";
 
+export interface EventCardData {
+  event: Event;
+  mainCard: FightCard;
+  prelimCard: FightCard | null;
+  picks: UserEventPicks | null;
+}
+
 export class FightsApiService {
+  // Get the event, its fights and the user's picks in a single request
+  static async getEventCard(eventId: string): Promise<EventCardData> {
+    try {
+      const response = await fetch(`${API_URL}/fights/event/${eventId}/card`, {
+        method: "GET",
+        credentials: "include",
+      });
+
+      if (!response.ok) {
+        throw new Error(`Failed to fetch fight card for event ${eventId}`);
+      }
+
+      const card = await response.json();
+
+      const mapFight = (fight: any): Fight => ({
+        id: fight.fight_id,
+        weightClass: fight.weight_class,
+        fighter1: {
+          id: fight.fighter1.fighter_id,
+          name: fight.fighter1.name,
+        },
+        fighter2: {
+          id: fight.fighter2.fighter_id,
+          name: fight.fighter2.name,
+        },
+      });
+
+      // Fights arrive in card order; split them the same way as getEventFights
+      const mainCardFights = card.fights
+        .filter((fight: any) => fight.is_main_event || fight.order <= 5)
+        .map(mapFight);
+      const prelimFights = card.fights
+        .filter((fight: any) => !fight.is_main_event && fight.order > 5)
+        .map(mapFight);
+
+      return {
+        event: EventsApiService.mapEvent(card.event),
+        mainCard: {
+          title: "Main Card",
+          fights:
+            mainCardFights.length > 0
+              ? mainCardFights
+              : card.fights.map(mapFight),
+        },
+        prelimCard:
+          prelimFights.length > 0
+            ? { title: "Preliminary Card", fights: prelimFights }
+            : null,
+        picks: card.submitted_at
+          ? PicksApiService.mapPicks({
+              event_id: card.event.id,
+              picks: card.picks,
+              submitted_at: card.submitted_at,
+            })
+          : null,
+      };
+    } catch (error) {
+      console.error("Error fetching fight card:", error);
+      throw error;
+    }
+  }
+
   // Get all fights for an event
   static async getEventFights(eventId: string): Promise<FightCard> {
     try {
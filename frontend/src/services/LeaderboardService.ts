@@ -14,6 +14,46 @@ export interface LeaderboardResponse {
   leaderboard: LeaderboardEntry[];
 }
 
+export type LeaderboardScore = Pick<
+  LeaderboardEntry,
+  "user_id" | "total_picks" | "correct_picks" | "accuracy_percentage"
+>;
+
+export interface LeaderboardChanges {
+  event_id: number;
+  changed: (LeaderboardEntry & { previous_rank: number | null })[];
+  scores: LeaderboardScore[];
+  removed: number[];
+}
+
+export interface LiveHandlers {
+  onSubscribed: () => void;
+  onResult?: (result: any) => void;
+  onLeaderboard: (changes: LeaderboardChanges) => void;
+}
+
+// Apply leaderboard changes pushed by the live stream to a loaded board:
+// entries whose rank moved are replaced, and entries that kept their rank
+// take their new scores
+export const applyLeaderboardChanges = (
+  leaderboard: LeaderboardEntry[],
+  changes: LeaderboardChanges
+): LeaderboardEntry[] => {
+  const changedIds = new Set(changes.changed.map((entry) => entry.user_id));
+  const removedIds = new Set(changes.removed);
+  const scores = new Map(changes.scores.map((score) => [score.user_id, score]));
+
+  return leaderboard
+    .filter(
+      (entry) => !changedIds.has(entry.user_id) && !removedIds.has(entry.user_id)
+    )
+    .map((entry) => ({ ...entry, ...scores.get(entry.user_id) }))
+    .concat(
+      changes.changed.map(({ previous_rank, ...entry }) => entry)
+    )
+    .sort((a, b) => a.rank - b.rank);
+};
+
 export class LeaderboardService {
   static async getEventLeaderboard(
     eventId: string
@@ -37,4 +77,21 @@ export class LeaderboardService {
       throw error;
     }
   }
+
+  // Subscribe to an event's result postings and leaderboard changes. The
+  // browser reconnects on its own; reload the board on every "subscribed".
+  // Returns a function that closes the stream.
+  static subscribeToEvent(eventId: string, handlers: LiveHandlers): () => void {
+    const source = new EventSource(`${API_URL}/live/events/${eventId}`);
+
+    source.addEventListener("subscribed", () => handlers.onSubscribed());
+    source.addEventListener("result", (message) =>
+      handlers.onResult?.(JSON.parse((message as MessageEvent).data).result)
+    );
+    source.addEventListener("leaderboard", (message) =>
+      handlers.onLeaderboard(JSON.parse((message as MessageEvent).data))
+    );
+
+    return () => source.close();
+  }
 }
@@ -1,5 +1,5 @@
 // src/services/PicksApiService.ts
-import { UserEventPicks, Pick } from "../types/Picks";
+import { UserEventPicks, Pick, FightConsensus } from "../types/Picks";
 
 const API_URL = "http://localhost:8000/api";
 
@@ -28,35 +28,7 @@ export class PicksApiService {
 
       const data = await response.json();
 
-      // Transform backend data structure to match our frontend types
-      const picksObj: Record<string, Pick> = {};
-
-      // Handle different response formats
-      if (Array.isArray(data.picks)) {
-        // If picks is an array of pick objects
-        data.picks.forEach((pick: any) => {
-          picksObj[pick.fight_id] = {
-            fighterId: pick.fighter_id,
-            method: pick.method,
-          };
-        });
-      } else if (typeof data.picks === "object") {
-        // If picks is already an object
-        for (const fightId in data.picks) {
-          const pick = data.picks[fightId];
-          picksObj[fightId] = {
-            fighterId: pick.fighter_id,
-            method: pick.method,
-          };
-        }
-      }
-
-      return {
-        eventId: data.event_id.toString(),
-        timestamp: data.submitted_at,
-        picks: picksObj,
-        isSubmitted: true,
-      };
+      return PicksApiService.mapPicks(data);
     } catch (error) {
       console.error("Error fetching user picks:", error);
       return null;
@@ -106,4 +78,85 @@ export class PicksApiService {
       throw error;
     }
   }
+
+  // Get how everyone picked each fight on an event's card, keyed by fight id
+  static async getEventConsensus(
+    eventId: string
+  ): Promise<Record<string, FightConsensus>> {
+    try {
+      const response = await fetch(
+        `${API_URL}/picks/event/${eventId}/consensus`,
+        {
+          method: "GET",
+          headers: {
+            "Content-Type": "application/json",
+          },
+        }
+      );
+
+      if (!response.ok) {
+        throw new Error(
+          `Failed to fetch consensus for event ${eventId}: ${response.statusText}`
+        );
+      }
+
+      const data = await response.json();
+
+      const consensus: Record<string, FightConsensus> = {};
+      data.fights.forEach((fight: any) => {
+        const fighters: Record<string, number> = {};
+        fight.fighters.forEach((share: any) => {
+          fighters[share.fighter_id] = share.percentage;
+        });
+
+        const methods: Record<string, number> = {};
+        fight.methods.forEach((share: any) => {
+          methods[share.method] = share.percentage;
+        });
+
+        consensus[fight.fight_id] = {
+          totalPicks: fight.total_picks,
+          fighters,
+          methods,
+        };
+      });
+      return consensus;
+    } catch (error) {
+      console.error("Error fetching pick consensus:", error);
+      return {};
+    }
+  }
+
+  // Transform a backend picks response to our UserEventPicks structure
+  static mapPicks(data: any): UserEventPicks {
+    // Transform backend data structure to match our frontend types
+    const picksObj: Record<string, Pick> = {};
+
+    // Handle different response formats
+    if (Array.isArray(data.picks)) {
+      // If picks is an array of pick objects
+      data.picks.forEach((pick: any) => {
+        picksObj[pick.fight_id] = {
+          fighterId: pick.fighter_id,
+          method: pick.method,
+        };
+      });
+    } else if (typeof data.picks === "object") {
+      // If picks is already an object
+      for (const fightId in data.picks) {
+        const pick = data.picks[fightId];
+        picksObj[fightId] = {
+          fighterId: pick.fighter_id,
+          method: pick.method,
+        };
+      }
+    }
+
+    return {
+      eventId: data.event_id.toString(),
+      timestamp: data.submitted_at,
+      picks: picksObj,
+      isSubmitted: true,
+    };
+  }
 }
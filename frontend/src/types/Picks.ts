@@ -9,3 +9,9 @@ export interface UserEventPicks {
   picks: Record<string, Pick>;
   isSubmitted: boolean;
 }
+
+export interface FightConsensus {
+  totalPicks: number;
+  fighters: Record<string, number>; // Percentage of picks by fighter id
+  methods: Record<string, number>; // Percentage of picks by method
+}